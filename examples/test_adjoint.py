@@ -0,0 +1,100 @@
+"""
+Example of optimization of the input pulse by the adjoint method. The group
+delay dispersion added to a 50 fs sech pulse at 835 nm is tuned to maximize
+the energy of the supercontinuum generated below 700 nm in a 5 centimeter
+long fiber.
+
+Every gradient step costs a forward and an adjoint propagation, regardless
+of the number of parameters the gradient is computed for.
+"""
+
+import copy
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import gnlse
+from gnlse.adjoint import SpectralBandEnergy
+
+
+def chirped(pulse, V, chirp):
+    """Adds group delay dispersion [ps^2] to a pulse."""
+    return np.fft.fft(np.fft.ifft(pulse) * np.exp(0.5j * chirp * V**2))
+
+
+if __name__ == '__main__':
+    setup = gnlse.GNLSESetup()
+
+    # Numerical parameters
+    setup.resolution = 2**11
+    setup.time_window = 8  # ps
+    setup.progress_bar = False
+    setup.rtol = 1e-6
+    setup.atol = 1e-8
+
+    # Physical parameters
+    setup.wavelength = 835  # nm
+    setup.fiber_length = 0.05  # m
+    setup.nonlinearity = 0.11  # 1/W/m
+    setup.raman_model = gnlse.raman_blowwood
+    setup.self_steepening = True
+
+    loss = 0
+    betas = np.array([-11.830e-3, 8.1038e-5, -9.5205e-8])
+    setup.dispersion_model = gnlse.DispersionFiberFromTaylor(loss, betas)
+
+    # Input pulse parameters
+    peak_power = 5000  # W
+    duration = 0.050  # ps
+
+    setup.pulse_model = gnlse.SechEnvelope(peak_power, duration)
+    solver = gnlse.GNLSE(setup)
+    pulse = solver.A
+    V = np.fft.fftshift(solver.V)
+    WL = 2 * np.pi * gnlse.common.c / solver.Omega  # wavelength grid
+    objective = SpectralBandEnergy(np.logical_and(WL > 0, WL < 700))
+
+    # Absorbing boundaries and moving frames are not supported by the
+    # adjoint method
+    unsupported = {'time_boundary': gnlse.SuperGaussianBoundary(),
+                   'frequency_boundary': gnlse.SuperGaussianBoundary(),
+                   'moving_frame': 0.25}
+    for name, value in unsupported.items():
+        variant = copy.copy(setup)
+        setattr(variant, name, value)
+        try:
+            gnlse.adjoint_gradient(variant, objective)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("'%s' was not rejected" % name)
+
+    chirp = 0
+    rate = 1e-11  # ps^2 per unit of the gradient
+    spectra = []
+    for iteration in range(5):
+        setup.pulse_model = chirped(pulse, V, chirp)
+        energy, gradient = gnlse.adjoint_gradient(
+            setup, objective, parameters=['chirp'])
+        print("GDD %.2e ps^2: energy below 700 nm %.3e"
+              % (chirp, energy))
+        if iteration in (0, 4):
+            spectra.append((chirp, setup.pulse_model))
+        chirp += rate * gradient['chirp']
+
+    plt.figure(figsize=(10, 5), facecolor='w', edgecolor='k')
+    for chirp, pulse_model in spectra:
+        setup.pulse_model = pulse_model
+        solution = gnlse.GNLSE(setup).run()
+        spectrum = np.abs(solution.AW[-1])**2
+        iis = np.logical_and(WL > 400, WL < 1400)
+        plt.plot(WL[iis], 10 * np.log10(spectrum[iis] / np.max(spectrum)),
+                 label="GDD %.2e ps$^2$" % chirp)
+    plt.axvline(700, color='k', linestyle='--')
+    plt.ylim(-40, 0)
+    plt.xlabel("Wavelength [nm]")
+    plt.ylabel("Spectrum [dB]")
+    plt.legend()
+
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,62 @@
+"""
+Example of supercontinuum generation in anomalous dispersion regime at
+a central wavelength of 835 nm in a 15 centimeter long fiber, as in
+test_Dudley.py, in a time window reduced from 12.5 ps to 10 ps with half the
+number of grid points.
+
+Absorbing layers at the edges of the time and frequency windows remove the
+radiation reaching them instead of letting it wrap around the periodic
+grids. The absorbed energy is reported in the statistics of the solution.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import gnlse
+
+
+if __name__ == '__main__':
+    setup = gnlse.GNLSESetup()
+
+    # Numerical parameters
+    setup.resolution = 2**13
+    setup.time_window = 10  # ps
+    setup.z_saves = 200
+    setup.time_boundary = gnlse.SuperGaussianBoundary(width=0.05)
+    setup.frequency_boundary = gnlse.SuperGaussianBoundary(width=0.05)
+
+    # Physical parameters
+    setup.wavelength = 835  # nm
+    setup.fiber_length = 0.15  # m
+    setup.nonlinearity = 0.11  # 1/W/m
+    setup.raman_model = gnlse.raman_blowwood
+    setup.self_steepening = True
+
+    loss = 0
+    betas = np.array([
+        -11.830e-3, 8.1038e-5, -9.5205e-8, 2.0737e-10, -5.3943e-13, 1.3486e-15,
+        -2.5495e-18, 3.0524e-21, -1.7140e-24
+    ])
+    setup.dispersion_model = gnlse.DispersionFiberFromTaylor(loss, betas)
+
+    # Input pulse parameters
+    peak_power = 10000  # W
+    duration = 0.050  # ps
+    setup.pulse_model = gnlse.SechEnvelope(peak_power, duration)
+
+    solver = gnlse.GNLSE(setup)
+    solution = solver.run()
+
+    dt = solution.t[1] - solution.t[0]
+    energy = np.sum(np.abs(solution.At[0])**2) * dt
+    print("Absorbed %.2f%% of %.1f pJ"
+          % (100 * solution.stats['absorbed'] / energy, energy))
+
+    plt.figure(figsize=(10, 8), facecolor='w', edgecolor='k')
+    plt.subplot(1, 2, 1)
+    gnlse.plot_wavelength_vs_distance(solution, WL_range=[400, 1400])
+    plt.subplot(1, 2, 2)
+    gnlse.plot_delay_vs_distance(solution, time_range=[-0.5, 4])
+
+    plt.tight_layout()
+    plt.show()
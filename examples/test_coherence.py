@@ -0,0 +1,73 @@
+"""
+Example of spectral coherence of supercontinuum generated in anomalous
+dispersion regime at a central wavelength of 835 nm in a 15 centimeter
+long fiber, as in Fig. 15 of J. M. Dudley, G. Genty, and S. Coen,
+Rev. Mod. Phys., vol. 78, no. 4, pp. 1135–1184, 2006.
+
+Every realization of the input pulse carries one-photon-per-mode noise and
+is propagated by the same solver. Statistics are accumulated realization
+by realization, so that only one solution is kept in memory at a time.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import gnlse
+
+
+if __name__ == '__main__':
+    setup = gnlse.GNLSESetup()
+
+    # Numerical parameters
+    setup.resolution = 2**13
+    setup.time_window = 12.5  # ps
+    setup.z_saves = 20
+
+    # Physical parameters
+    setup.wavelength = 835  # nm
+    setup.fiber_length = 0.15  # m
+    setup.nonlinearity = 0.11  # 1/W/m
+    setup.raman_model = gnlse.raman_blowwood
+    setup.self_steepening = True
+
+    loss = 0
+    betas = np.array([
+        -11.830e-3, 8.1038e-5, -9.5205e-8, 2.0737e-10, -5.3943e-13, 1.3486e-15,
+        -2.5495e-18, 3.0524e-21, -1.7140e-24
+    ])
+    setup.dispersion_model = gnlse.DispersionFiberFromTaylor(loss, betas)
+
+    # Input pulse parameters
+    peak_power = 10000  # W
+    duration = 0.050  # ps
+    realizations = 10
+
+    setup.pulse_model = gnlse.SechEnvelope(peak_power, duration)
+
+    # The operators of the fiber are prepared once for all realizations
+    solver = gnlse.GNLSE(setup)
+    pulse = setup.pulse_model.A(solver.t)
+    noise = gnlse.one_photon_per_mode(solver.t, setup.wavelength,
+                                      realizations, seed=2006)
+
+    statistics = gnlse.EnsembleStatistics()
+    for k in range(realizations):
+        statistics.update(solver.propagate(pulse + noise[k]))
+
+    WL = 2 * np.pi * gnlse.common.c / statistics.W  # wavelength grid
+    iis = np.logical_and(WL > 400, WL < 1400)
+    spectrum = statistics.spectrum[-1]
+
+    plt.figure(figsize=(10, 5), facecolor='w', edgecolor='k')
+    plt.subplot(2, 1, 1)
+    plt.plot(WL[iis], 10 * np.log10(spectrum[iis] / np.max(spectrum)))
+    plt.ylim(-40, 0)
+    plt.ylabel("Mean spectrum [dB]")
+    plt.subplot(2, 1, 2)
+    plt.plot(WL[iis], statistics.coherence[-1][iis])
+    plt.ylim(0, 1.05)
+    plt.xlabel("Wavelength [nm]")
+    plt.ylabel("$|g_{12}^{(1)}|$")
+
+    plt.tight_layout()
+    plt.show()
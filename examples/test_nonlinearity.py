@@ -32,7 +32,6 @@ if __name__ == '__main__':
 
     # Physical parameters
     setup.wavelength = 835  # nm
-    w0 = (2.0 * np.pi * gnlse.common.c) / setup.wavelength  # 1/ps = THz
     setup.fiber_length = 0.15  # m
     setup.raman_model = gnlse.raman_blowwood
     setup.self_steepening = True
@@ -50,10 +49,8 @@ if __name__ == '__main__':
     betas = np.array([-0.024948815481502, 8.875391917212998e-05,
                       -9.247462376518329e-08, 1.508210856829677e-10])
     setup.dispersion_model = gnlse.DispersionFiberFromTaylor(loss, betas)
-    # parameters for calculating the nonlinearity
+    # nonlinear index of refraction
     n2 = 2.7e-20  # m^2/W
-    Aeff0 = 1.78e-12  # 1/m^2
-    gamma = n2 * w0 / gnlse.common.c / 1e-9 / Aeff0  # 1/W/m
 
     # read mat file for neffs to cover interpolation example
     mat_path = os.path.join(os.path.dirname(__file__), '..',
@@ -67,6 +64,11 @@ if __name__ == '__main__':
     # efective mode area in m^2
     Aeff = mat['neff'][:, 2] * 1e-12
 
+    nonlinearity = gnlse.NonlinearityFromEffectiveArea(
+        neff, Aeff, lambdas, setup.wavelength, n2=n2, neff_max=10)
+    # scalar nonlinearity of the same fiber at the pump wavelength
+    gamma = nonlinearity.gamma0()  # 1/W/m
+
     # This example extends the original code with additional simulations for
     nonlinearity_setups = [
         ["Scalar $\\gamma$",
@@ -74,9 +76,7 @@ if __name__ == '__main__':
          gamma],
         ["Frequency dependent $\\gamma$",
          gnlse.DispersionFiberFromTaylor(loss, betas),
-         gnlse.NonlinearityFromEffectiveArea(
-             neff, Aeff, lambdas, setup.wavelength,
-             n2=n2, neff_max=10)]
+         nonlinearity]
     ]
 
     count = len(nonlinearity_setups)
@@ -0,0 +1,85 @@
+"""
+Example of propagation of a fundamental soliton at a central wavelength of
+835 nm in a 50 centimeter long fiber, computed serially and with spans of
+the fiber propagated in parallel by the parareal algorithm.
+
+Parareal pays off only when the accurate propagation of the whole fiber is
+much more expensive than the serial coarse sweeps over all spans and the
+iteration converges in a few iterations, which here are the tight
+tolerances of the integrator and the smooth evolution of the soliton. The
+wall-clock speed-up is at most the number of spans divided by the number
+of iterations, 4 here, and requires a free CPU for every span; with the
+cost of the coarse sweeps it is about 2 with 8 CPUs. With fewer CPUs the
+parareal run is slower than the serial one.
+Strongly nonlinear propagation, e.g. soliton fission, needs almost as many
+iterations as there are spans and does not gain from parareal.
+"""
+
+import os
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import gnlse
+
+
+if __name__ == '__main__':
+    setup = gnlse.GNLSESetup()
+
+    # Numerical parameters
+    setup.resolution = 2**11
+    setup.time_window = 12.5  # ps
+    setup.z_saves = 101
+    setup.rtol = 1e-9
+    setup.atol = 1e-11
+    setup.progress_bar = False
+
+    # Physical parameters
+    setup.wavelength = 835  # nm
+    setup.fiber_length = 0.5  # m
+    setup.nonlinearity = 0.11  # 1/W/m
+    setup.raman_model = gnlse.raman_blowwood
+    setup.self_steepening = True
+
+    loss = 0
+    betas = np.array([
+        -11.830e-3, 8.1038e-5, -9.5205e-8, 2.0737e-10, -5.3943e-13, 1.3486e-15,
+        -2.5495e-18, 3.0524e-21, -1.7140e-24
+    ])
+    setup.dispersion_model = gnlse.DispersionFiberFromTaylor(loss, betas)
+
+    # Input pulse parameters
+    peak_power = 150  # W
+    duration = 0.050  # ps
+    setup.pulse_model = gnlse.SechEnvelope(peak_power, duration)
+
+    start = time.perf_counter()
+    serial = gnlse.GNLSE(setup).run()
+    print("Serial: %.1f s" % (time.perf_counter() - start))
+
+    # Spans converge to a tolerance looser than that of the integrator
+    spans = 8
+    start = time.perf_counter()
+    parallel = gnlse.PararealGNLSE(setup, spans=spans, coarse_steps=8,
+                                   tolerance=1e-6).run()
+    iterations = parallel.stats['iterations']
+    print("Parareal: %.1f s, %d iterations, speed-up at most %.1f with %d "
+          "CPUs (%d available)" % (time.perf_counter() - start, iterations,
+                                   spans / iterations, spans,
+                                   os.cpu_count() or 1))
+
+    error = np.max(np.abs(parallel.At[-1] - serial.At[-1])) \
+        / np.max(np.abs(serial.At[-1]))
+    print("Largest relative difference of output fields: %.1e" % error)
+
+    plt.figure(figsize=(10, 5), facecolor='w', edgecolor='k')
+    plt.subplot(1, 2, 1)
+    plt.title("Serial")
+    gnlse.plot_delay_vs_distance(serial, time_range=[-0.5, 1])
+    plt.subplot(1, 2, 2)
+    plt.title("Parareal")
+    gnlse.plot_delay_vs_distance(parallel, time_range=[-0.5, 1])
+
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,70 @@
+"""
+Example of tracking of solitons ejected by fission of a higher-order soliton
+in the supercontinuum generation case of test_Dudley.py. Peaks of the
+temporal intensity are found in all slices and linked into trajectories,
+drawn over the temporal evolution. Peaks too weak, too narrow or too
+short-lived to be solitons are dropped. The red shift of the central
+frequencies of the solitons shows the Raman soliton self-frequency shift.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import gnlse
+
+
+if __name__ == '__main__':
+    setup = gnlse.GNLSESetup()
+
+    # Numerical parameters
+    setup.resolution = 2**13
+    setup.time_window = 12.5  # ps
+    setup.z_saves = 200
+
+    # Physical parameters
+    setup.wavelength = 835  # nm
+    setup.fiber_length = 0.15  # m
+    setup.nonlinearity = 0.11  # 1/W/m
+    setup.raman_model = gnlse.raman_blowwood
+    setup.self_steepening = True
+
+    loss = 0
+    betas = np.array([
+        -11.830e-3, 8.1038e-5, -9.5205e-8, 2.0737e-10, -5.3943e-13, 1.3486e-15,
+        -2.5495e-18, 3.0524e-21, -1.7140e-24
+    ])
+    setup.dispersion_model = gnlse.DispersionFiberFromTaylor(loss, betas)
+
+    # Input pulse parameters
+    peak_power = 10000  # W
+    duration = 0.050  # ps
+    setup.pulse_model = gnlse.SechEnvelope(peak_power, duration)
+
+    solver = gnlse.GNLSE(setup)
+    solution = solver.run()
+
+    # Peaks above 2% of the peak power of a slice, at least 1 kW and 10 fs
+    # wide, tracked over at least an eighth of the fiber. Narrower and
+    # weaker peaks are interference fringes of the dispersive waves.
+    trajectories = gnlse.track_solitons(solution, threshold=0.02, window=0.2,
+                                        max_shift=0.05, min_power=1000,
+                                        min_duration=0.010, min_length=25)
+    for k in range(len(trajectories)):
+        last = np.flatnonzero(~np.isnan(trajectories.delay[k]))[-1]
+        print("Soliton %d: %.3f ps, %.0f W, %.1f fs, %.1f THz" % (
+            k, trajectories.delay[k, last], trajectories.power[k, last],
+            1e3 * trajectories.duration[k, last],
+            trajectories.frequency[k, last]))
+
+    plt.figure(figsize=(10, 5), facecolor='w', edgecolor='k')
+    ax = plt.subplot(1, 2, 1)
+    gnlse.plot_delay_vs_distance(solution, time_range=[-0.5, 5], ax=ax)
+    ax.plot(trajectories.delay.T, trajectories.Z, 'w--', linewidth=1)
+
+    ax = plt.subplot(1, 2, 2)
+    ax.plot(trajectories.frequency.T, trajectories.Z)
+    ax.set_xlabel("Central frequency [THz]")
+    ax.set_ylabel("Distance [m]")
+
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,61 @@
+"""
+Example of supercontinuum generation in a tapered fiber. The taper is
+described by local Taylor expansions of the propagation constant and local
+values of the nonlinear coefficient at a few positions along the fiber.
+The solver interpolates both between the given positions.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import gnlse
+
+
+if __name__ == '__main__':
+    setup = gnlse.GNLSESetup()
+
+    # Numerical parameters
+    setup.resolution = 2**13
+    setup.time_window = 12.5  # ps
+    setup.z_saves = 200
+
+    # Physical parameters
+    setup.wavelength = 835  # nm
+    setup.fiber_length = 0.15  # m
+    setup.raman_model = gnlse.raman_blowwood
+    setup.self_steepening = True
+
+    # Dispersion of the untapered fiber
+    loss = 0
+    betas = np.array([
+        -11.830e-3, 8.1038e-5, -9.5205e-8, 2.0737e-10, -5.3943e-13, 1.3486e-15,
+        -2.5495e-18, 3.0524e-21, -1.7140e-24
+    ])
+
+    # The waist of the taper is reached after 5 cm; its dispersion is
+    # weaker and the nonlinearity is twice larger.
+    z = [0, 0.05, 0.15]  # m
+    setup.dispersion_model = gnlse.DispersionFiberAlongZ(z, [
+        gnlse.DispersionFiberFromTaylor(loss, betas),
+        gnlse.DispersionFiberFromTaylor(loss, 0.8 * betas),
+        gnlse.DispersionFiberFromTaylor(loss, 0.8 * betas)
+    ])
+    setup.nonlinearity = gnlse.NonlinearityAlongZ(z, [0.11, 0.22, 0.22])
+
+    # Input pulse parameters
+    peak_power = 2000  # W
+    duration = 0.050  # ps
+    setup.pulse_model = gnlse.SechEnvelope(peak_power, duration)
+
+    solver = gnlse.GNLSE(setup)
+    solution = solver.run()
+
+    plt.figure(figsize=(10, 5), facecolor='w', edgecolor='k')
+    plt.subplot(1, 2, 1)
+    gnlse.plot_frequency_vs_distance_logarithmic(
+        solution, frequency_range=[-150, 150])
+    plt.subplot(1, 2, 2)
+    gnlse.plot_delay_vs_distance(solution, time_range=[-0.5, 5])
+
+    plt.tight_layout()
+    plt.show()
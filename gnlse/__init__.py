@@ -1,26 +1,54 @@
+import importlib
+
+from gnlse.adjoint import adjoint_gradient
+from gnlse.benchmark import run_benchmark, pareto_front
+from gnlse.boundaries import SuperGaussianBoundary
 from gnlse.dispersion import (DispersionFiberFromTaylor,
-                              DispersionFiberFromInterpolation)
+                              DispersionFiberFromInterpolation,
+                              DispersionFiberAlongZ)
+from gnlse.ensemble import EnsembleStatistics
 from gnlse.envelopes import (SechEnvelope, GaussianEnvelope,
                              LorentzianEnvelope, CWEnvelope)
-from gnlse.gnlse import GNLSESetup, Solution, GNLSE
-from gnlse.import_export import read_mat, write_mat
-from gnlse.nonlinearity import NonlinearityFromEffectiveArea
+from gnlse.gnlse import GNLSESetup, Solution, LazySolution, GNLSE
+from gnlse.import_export import read_mat, write_mat, read_file, write_file
+from gnlse.jax_backend import JaxGNLSE
+from gnlse.noise import one_photon_per_mode
+from gnlse.nonlinearity import (NonlinearityFromEffectiveArea,
+                                NonlinearityAlongZ)
+from gnlse.parareal import PararealGNLSE
+from gnlse.reducers import SpectralBandwidth, BandEnergy
 from gnlse.raman_response import (raman_blowwood, raman_holltrell,
                                   raman_linagrawal)
-from gnlse.visualization import (
-    plot_delay_vs_distance,
-    plot_delay_vs_distance_logarithmic,
-    plot_delay_for_distance_slice,
-    plot_delay_for_distance_slice_logarithmic,
-    plot_frequency_vs_distance,
-    plot_frequency_vs_distance_logarithmic,
-    plot_frequency_for_distance_slice,
-    plot_frequency_for_distance_slice_logarithmic,
-    plot_wavelength_vs_distance,
-    plot_wavelength_vs_distance_logarithmic,
-    plot_wavelength_for_distance_slice,
-    plot_wavelength_for_distance_slice_logarithmic,
-    quick_plot)
+from gnlse.solitons import find_peaks, track_peaks, track_solitons
+from gnlse.sweep import SweepStore, run_sweep, run_threaded
+
+# Plotting functions are imported on first use, so that simulations can run
+# without importing matplotlib.
+_visualization = [
+    'plot_delay_vs_distance',
+    'plot_delay_vs_distance_logarithmic',
+    'plot_delay_for_distance_slice',
+    'plot_delay_for_distance_slice_logarithmic',
+    'plot_frequency_vs_distance',
+    'plot_frequency_vs_distance_logarithmic',
+    'plot_frequency_for_distance_slice',
+    'plot_frequency_for_distance_slice_logarithmic',
+    'plot_wavelength_vs_distance',
+    'plot_wavelength_vs_distance_logarithmic',
+    'plot_wavelength_for_distance_slice',
+    'plot_wavelength_for_distance_slice_logarithmic',
+    'quick_plot'
+]
+
+
+def __getattr__(name):
+    if name in _visualization or name == 'visualization':
+        visualization = importlib.import_module('gnlse.visualization')
+        if name == 'visualization':
+            return visualization
+        return getattr(visualization, name)
+    raise AttributeError("module 'gnlse' has no attribute '%s'" % name)
+
 
 __all__ = [
     'DispersionFiberFromTaylor', 'DispersionFiberFromInterpolation',
@@ -39,5 +67,12 @@ __all__ = [
     'plot_wavelength_vs_distance_logarithmic',
     'plot_wavelength_for_distance_slice',
     'plot_wavelength_for_distance_slice_logarithmic',
-    'quick_plot', 'NonlinearityFromEffectiveArea', 'CWEnvelope'
+    'quick_plot', 'NonlinearityFromEffectiveArea', 'CWEnvelope',
+    'DispersionFiberAlongZ', 'NonlinearityAlongZ', 'read_file', 'write_file',
+    'LazySolution', 'one_photon_per_mode',
+    'EnsembleStatistics', 'adjoint_gradient', 'JaxGNLSE',
+    'SuperGaussianBoundary', 'PararealGNLSE', 'SweepStore', 'run_sweep',
+    'run_threaded',
+    'SpectralBandwidth', 'BandEnergy', 'find_peaks', 'track_peaks',
+    'track_solitons', 'run_benchmark', 'pareto_front'
 ]
@@ -0,0 +1,5 @@
+import sys
+
+from gnlse.cli import main
+
+sys.exit(main())
@@ -0,0 +1,253 @@
+"""Accuracy versus cost of numerical settings.
+
+A setup is solved once with tight tolerances as a reference, and then for
+every combination of numerical settings, e.g. ``method``, ``rtol``,
+``atol`` and ``resolution`` of ``GNLSESetup``. For every combination the
+relative L2 errors of the output spectral and temporal intensities, the
+drift of the photon number, the run time, the number of evaluations of
+the right hand side and, in a separate run, the peak memory allocated
+during the run are measured. The combinations not beaten in both cost and
+error by any other form the Pareto front, from which the cheapest settings
+within a given error are picked.
+
+Example
+-------
+::
+
+    results = gnlse.run_benchmark(setup, {
+        'method': ['RK45', 'DOP853'],
+        'rtol': [1e-3, 1e-5],
+        'resolution': [2**12, 2**13]})
+    gnlse.benchmark.print_results(gnlse.pareto_front(results))
+
+"""
+
+import copy
+import itertools
+import time
+import tracemalloc
+
+import numpy as np
+
+from gnlse.gnlse import GNLSE
+
+# Settings of the default reference solution
+REFERENCE = {'method': 'DOP853', 'rtol': 1e-9, 'atol': 1e-12}
+
+
+def _intensity_error(x, intensity, x_ref, reference):
+    """Relative L2 error of an intensity on the grid of the reference."""
+    if len(x) != len(x_ref) or not np.allclose(x, x_ref):
+        intensity = np.interp(x_ref, x, intensity)
+    return np.linalg.norm(intensity - reference) / np.linalg.norm(reference)
+
+
+def measure(setup, reference=None, memory=True):
+    """
+    Solves a setup, measuring its cost and error.
+
+    Parameters
+    ----------
+    setup : GNLSESetup
+        Model inputs.
+    reference : Solution, optional
+        Reference solution of the same problem. Errors are not measured
+        if not given.
+    memory : bool, optional
+        Whether to measure the peak memory in a second run. Tracing of
+        allocations slows the run unevenly across solvers, so the timed
+        run is never traced.
+
+    Returns
+    -------
+    dict
+        Run time (``time``) [s], peak memory allocated during the run
+        (``memory``) [B], ``nan`` if not measured, number of evaluations
+        of the right hand side
+        (``nfev``), relative drift of the photon number (``drift``), the
+        first accepted step size (``first_step``) [m] and,
+        with a reference, relative L2 errors of the output spectral
+        (``spectral_error``) and temporal (``temporal_error``)
+        intensities.
+    """
+
+    setup = copy.copy(setup)
+    setup.progress_bar = False
+
+    start = time.perf_counter()
+    solution = GNLSE(setup).run()
+    run_time = time.perf_counter() - start
+
+    peak = np.nan
+    if memory:
+        tracemalloc.start()
+        try:
+            GNLSE(setup).run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    result = {'time': run_time, 'memory': peak,
+              'nfev': solution.stats['nfev'],
+              'drift': abs(solution.stats['drift']),
+              'first_step': solution.stats['first_step']}
+    if reference is not None:
+        result['spectral_error'] = _intensity_error(
+            solution.W, np.abs(solution.AW[-1])**2,
+            reference.W, np.abs(reference.AW[-1])**2)
+        result['temporal_error'] = _intensity_error(
+            solution.t, np.abs(solution.At[-1])**2,
+            reference.t, np.abs(reference.At[-1])**2)
+    return result
+
+
+def run_benchmark(setup, grid, reference=None):
+    """
+    Measures cost and error of combinations of numerical settings.
+
+    Parameters
+    ----------
+    setup : GNLSESetup
+        Model inputs.
+    grid : dict
+        Lists of values of attributes of ``GNLSESetup`` by name. Every
+        combination of them is measured.
+    reference : GNLSESetup or Solution, optional
+        Reference solution, or setup solved for it. By default ``setup``
+        is solved with the settings in ``REFERENCE``.
+
+    Returns
+    -------
+    list of dict
+        Results of ``measure`` for every combination, with its settings
+        under ``parameters``.
+    """
+
+    if reference is None:
+        reference = copy.copy(setup)
+        for key, value in REFERENCE.items():
+            setattr(reference, key, value)
+    if not hasattr(reference, 'AW'):
+        reference = copy.copy(reference)
+        reference.progress_bar = False
+        reference = GNLSE(reference).run()
+
+    names = list(grid)
+    results = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        candidate = copy.copy(setup)
+        for name, value in zip(names, values):
+            setattr(candidate, name, value)
+        result = measure(candidate, reference)
+        result['parameters'] = dict(zip(names, values))
+        results.append(result)
+    return results
+
+
+def pareto_front(results, cost='time', error='spectral_error'):
+    """
+    Selects results not dominated in cost and error by any other.
+
+    Parameters
+    ----------
+    results : list of dict
+        Results of ``run_benchmark``.
+    cost : str, optional
+        Measure of cost: ``'time'``, ``'nfev'`` or ``'memory'``.
+    error : str, optional
+        Measure of error: ``'spectral_error'``, ``'temporal_error'`` or
+        ``'drift'``.
+
+    Returns
+    -------
+    list of dict
+        Results on the Pareto front, ordered by increasing cost.
+    """
+
+    front = []
+    for result in sorted(results, key=lambda r: (r[cost], r[error])):
+        if not front or result[error] < front[-1][error]:
+            front.append(result)
+    return front
+
+
+def print_results(results):
+    """Prints results of ``run_benchmark`` as a table."""
+
+    names = sorted({name for result in results
+                    for name in result['parameters']})
+    columns = names + ['time [s]', 'memory [MB]', 'nfev', 'spectral',
+                       'temporal', 'drift']
+    rows = []
+    for result in results:
+        rows.append([str(result['parameters'].get(name, ''))
+                     for name in names] + [
+            '%.3f' % result['time'], '%.1f' % (result['memory'] / 1e6),
+            '%d' % result['nfev'],
+            '%.2e' % result.get('spectral_error', np.nan),
+            '%.2e' % result.get('temporal_error', np.nan),
+            '%.2e' % result['drift']])
+    widths = [max(len(row[i]) for row in rows + [columns])
+              for i in range(len(columns))]
+    for row in [columns] + rows:
+        print('  '.join(value.rjust(width)
+                        for value, width in zip(row, widths)))
+
+
+def propose_tolerances(setups, target=1e-3, rtols=(1e-2, 1e-3, 1e-4, 1e-5,
+                                                   1e-6),
+                       error='spectral_error', pilots=None):
+    """
+    Proposes the loosest tolerances meeting a target error for a family of
+    similar setups, e.g. a sweep over the input power, from pilot runs.
+
+    The ratio of ``atol`` to ``rtol`` of the first pilot setup is kept.
+
+    Parameters
+    ----------
+    setups : list of GNLSESetup
+        Family of setups.
+    target : float, optional
+        Largest accepted error.
+    rtols : list of float, optional
+        Candidate relative tolerances, from the loosest.
+    error : str, optional
+        Measure of error: ``'spectral_error'``, ``'temporal_error'`` or
+        ``'drift'``.
+    pilots : list of int, optional
+        Indices of setups solved in pilot runs. By default the first and
+        the last setup, the extremes of a sweep.
+
+    Returns
+    -------
+    dict
+        Proposed ``rtol`` and ``atol``, the largest error of pilot runs
+        with them (``error``) and whether it meets the target
+        (``converged``). If no candidate meets the target, the tightest
+        one is proposed.
+    """
+
+    if pilots is None:
+        pilots = sorted({0, len(setups) - 1})
+
+    ratio = setups[pilots[0]].atol / setups[pilots[0]].rtol
+    worst = np.zeros(len(rtols))
+    for index in pilots:
+        setup = setups[index]
+        reference = copy.copy(setup)
+        for key, value in REFERENCE.items():
+            setattr(reference, key, value)
+        reference.progress_bar = False
+        reference = GNLSE(reference).run()
+
+        for i, rtol in enumerate(rtols):
+            pilot = copy.copy(setup)
+            pilot.rtol = rtol
+            pilot.atol = rtol * ratio
+            result = measure(pilot, reference, memory=False)
+            worst[i] = max(worst[i], result[error])
+
+    meets = np.flatnonzero(worst <= target)
+    i = meets[0] if len(meets) else len(rtols) - 1
+    return {'rtol': rtols[i], 'atol': rtols[i] * ratio,
+            'error': float(worst[i]), 'converged': bool(len(meets))}
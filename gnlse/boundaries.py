@@ -0,0 +1,59 @@
+"""Absorbing boundaries of the computational grid.
+
+The time and frequency grids of the split-step method are periodic: energy
+leaving one edge of the window enters at the other. Absorbing layers at
+the edges remove it instead, so the grids need not be oversized to keep
+the field away from their edges. The layers are super-Gaussian profiles of
+an absorption rate, which rises smoothly to limit reflections from the
+layer itself. The absorption is applied with the nonlinear term, so that
+the interaction picture does not amplify the absorbed components. The
+energy absorbed along the fiber is reported in ``Solution.stats``.
+
+"""
+
+import numpy as np
+
+
+class SuperGaussianBoundary(object):
+    """Super-Gaussian absorbing layers at both edges of a grid.
+
+    Attributes
+    ----------
+    width : float
+        Width of each layer relative to the whole grid.
+    order : int
+        Order of the super-Gaussian profile. Higher orders give sharper
+        inner edges of the layers.
+    strength : float
+        Attenuation of the field amplitude at the edges of the grid over
+        the whole fiber length [Np].
+    """
+
+    def __init__(self, width=0.1, order=20, strength=20):
+        if not 0 < width < 0.5:
+            raise ValueError("'width' has to be between 0 and 0.5")
+        self.width = width
+        self.order = order
+        self.strength = strength
+
+    def rate(self, x, fiber_length):
+        """Absorption rate of the field amplitude along a grid.
+
+        Parameters
+        ----------
+        x : ndarray, (n,)
+            Ascending time [ps] or frequency grid.
+        fiber_length : float
+            Length of the fiber [m].
+
+        Returns
+        -------
+        ndarray, (n,)
+            Absorption rate [1/m].
+        """
+        center = (x[0] + x[-1]) / 2
+        half = (x[-1] - x[0]) / 2
+        # The profile rises at the middle of the layers
+        u = (x - center) / (half * (1 - self.width))
+        window = np.exp(-u**(2 * self.order))
+        return self.strength / fiber_length * (1 - window)
@@ -0,0 +1,165 @@
+"""Command-line runner for simulations described in configuration files.
+
+Runs every simulation described in a configuration file (see
+``gnlse.config``), writes the results in the format chosen by extension of
+the output path and prints timing and solver statistics. Plotting code is
+never imported.
+
+Example
+-------
+::
+
+    gnlse setup.json --output result.h5
+    gnlse sweep.json --output result.npz --jobs 4
+
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import os
+import sys
+import time
+
+from gnlse.config import expand_sweep, load_config, setup_from_config
+from gnlse.gnlse import GNLSE
+from gnlse.sweep import SweepStore, run_sweep
+
+
+def output_path(output, index, count):
+    """Path of the result of ``index``-th out of ``count`` simulations.
+
+    ``{index}`` in ``output`` is replaced by the index of a simulation.
+    Otherwise the index is appended to the file name if there are many
+    simulations.
+    """
+
+    if '{index}' in output:
+        return output.format(index=index)
+    if count == 1:
+        return output
+    root, extension = os.path.splitext(output)
+    return '%s_%d%s' % (root, index, extension)
+
+
+def report(index, count, path, parameters, stats, timing):
+    """Prints parameters, timing and solver statistics of a simulation."""
+
+    print('[%d/%d] %s' % (index + 1, count, path))
+    for key, value in parameters.items():
+        print('  %s: %s' % (key, value))
+    print('  %s' % timing)
+    for key, value in stats.items():
+        print('  %s: %s' % (key, value))
+    sys.stdout.flush()
+
+
+def run_parallel(runs, setups, output, jobs):
+    """Runs setups of a sweep in a process pool and writes their results.
+
+    Setups with equal ``z_saves`` and ``resolution`` share a store, and
+    the stores of all groups are filled concurrently.
+    """
+
+    groups = {}
+    for index, setup in enumerate(setups):
+        groups.setdefault((setup.z_saves, setup.resolution),
+                          []).append(index)
+
+    with contextlib.ExitStack() as stack:
+        executor = stack.enter_context(
+            concurrent.futures.ProcessPoolExecutor(jobs))
+        stores = [stack.enter_context(SweepStore(len(indices), *key))
+                  for key, indices in groups.items()]
+
+        def run_group(store, indices):
+            return run_sweep([setups[i] for i in indices], store, executor)
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(len(stores)) as threads:
+            results = list(threads.map(run_group, stores, groups.values()))
+        print('sweep: %.3f s' % (time.perf_counter() - start))
+
+        solutions = [None] * len(setups)
+        for indices, group in zip(groups.values(), results):
+            for index, solution in zip(indices, group):
+                solutions[index] = solution
+        for index, (parameters, _) in enumerate(runs):
+            start = time.perf_counter()
+            path = output_path(output, index, len(runs))
+            solutions[index].to_file(path)
+            write_time = time.perf_counter() - start
+            report(index, len(runs), path, parameters,
+                   solutions[index].stats, 'write: %.3f s' % write_time)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='gnlse',
+        description='Solve the GNLSE for setups described in a JSON, YAML '
+                    'or TOML configuration file.')
+    parser.add_argument('config', help='path to configuration file')
+    parser.add_argument('-o', '--output',
+                        help='path to result file; the format is chosen by '
+                             'extension (.mat, .h5, .hdf5, .npz, .zarr). '
+                             'Defaults to the configuration name with .h5')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not display progress of integration')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of simulations of a sweep run in '
+                             'parallel processes, with results in shared '
+                             'memory')
+    parser.add_argument('-w', '--warm-start', action='store_true',
+                        help='start every simulation of a sweep with the '
+                             'median step size of the previous one; not '
+                             'with --jobs')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    output = args.output
+    if output is None:
+        output = config.pop('output', None) or \
+            os.path.splitext(args.config)[0] + '.h5'
+    else:
+        config.pop('output', None)
+
+    runs = expand_sweep(config)
+    if args.jobs > 1 and len(runs) > 1:
+        if args.warm_start:
+            parser.error('--warm-start chains runs one after another and '
+                         'cannot be used with --jobs')
+        setups = [setup_from_config(run) for _, run in runs]
+        if args.quiet:
+            for setup in setups:
+                setup.progress_bar = False
+        run_parallel(runs, setups, output, args.jobs)
+        return 0
+
+    step = None
+    for index, (parameters, run) in enumerate(runs):
+        setup = setup_from_config(run)
+        if args.quiet:
+            setup.progress_bar = False
+        if args.warm_start and setup.first_step is None:
+            setup.first_step = step
+
+        start = time.perf_counter()
+        solver = GNLSE(setup)
+        setup_time = time.perf_counter() - start
+        solution = solver.run()
+        run_time = time.perf_counter() - start - setup_time
+        step = solution.stats['median_step']
+
+        path = output_path(output, index, len(runs))
+        solution.to_file(path)
+        write_time = time.perf_counter() - start - setup_time - run_time
+
+        report(index, len(runs), path, parameters, solution.stats,
+               'setup: %.3f s, run: %.3f s, write: %.3f s'
+               % (setup_time, run_time, write_time))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
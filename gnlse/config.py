@@ -0,0 +1,182 @@
+"""Simulation setups described in configuration files.
+
+A configuration is a dictionary read from a JSON, YAML (requires
+``pyyaml``) or TOML file. Its keys are attributes of ``GNLSESetup``.
+Models are given as dictionaries with the name of the class under
+``type`` and the arguments of its constructor, Raman models by name.
+An optional ``sweep`` maps dotted paths of parameters to lists of values;
+one setup is created for every combination of them.
+
+Example
+-------
+::
+
+    {
+        "resolution": 8192,
+        "time_window": 12.5,
+        "wavelength": 835,
+        "fiber_length": 0.15,
+        "nonlinearity": 0.11,
+        "raman_model": "blowwood",
+        "self_steepening": true,
+        "dispersion_model": {"type": "DispersionFiberFromTaylor",
+                             "loss": 0, "betas": [-11.830e-3, 8.1038e-5]},
+        "pulse_model": {"type": "SechEnvelope", "Pmax": 10000,
+                        "FWHM": 0.05},
+        "first_step": 1e-6,
+        "error_norm": {"type": "SpectralErrorNorm", "floor": 1e-12},
+        "sweep": {"pulse_model.Pmax": [1000, 10000]}
+    }
+
+"""
+
+import copy
+import itertools
+import json
+import os
+
+import numpy as np
+
+from gnlse import (boundaries, dispersion, envelopes, integrators,
+                   nonlinearity, raman_response)
+from gnlse.gnlse import GNLSESetup
+
+MODELS = {
+    cls.__name__: cls for cls in (
+        boundaries.SuperGaussianBoundary,
+        dispersion.DispersionFiberFromTaylor,
+        dispersion.DispersionFiberFromInterpolation,
+        dispersion.DispersionFiberAlongZ,
+        envelopes.SechEnvelope,
+        envelopes.GaussianEnvelope,
+        envelopes.LorentzianEnvelope,
+        envelopes.CWEnvelope,
+        integrators.SpectralErrorNorm,
+        nonlinearity.NonlinearityFromEffectiveArea,
+        nonlinearity.NonlinearityAlongZ,
+    )
+}
+
+RAMAN_MODELS = {
+    'blowwood': raman_response.raman_blowwood,
+    'holltrell': raman_response.raman_holltrell,
+    'linagrawal': raman_response.raman_linagrawal,
+}
+
+
+def load_config(path):
+    """Reads configuration file.
+
+    Parameters
+    ----------
+    path : str
+        Path to \\*.json, \\*.yaml, \\*.yml or \\*.toml file.
+
+    Returns
+    -------
+    config : dict
+        Configuration read from the file.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.yaml', '.yml'):
+        import yaml
+
+        with open(path, 'r') as f:
+            return yaml.safe_load(f)
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def build_model(description):
+    """Creates a model described in a configuration.
+
+    Dictionaries with the ``type`` key are turned into instances of the
+    named class, lists of numbers into arrays. Other values are returned
+    unchanged.
+    """
+
+    if isinstance(description, dict) and 'type' in description:
+        kwargs = dict(description)
+        name = kwargs.pop('type')
+        if name not in MODELS:
+            raise ValueError("unknown model '%s'" % name)
+        return MODELS[name](**{key: build_model(value)
+                               for key, value in kwargs.items()})
+    if isinstance(description, list):
+        values = [build_model(value) for value in description]
+        if all(isinstance(value, (int, float)) for value in values):
+            return np.array(values, dtype=float)
+        return values
+    return description
+
+
+def setup_from_config(config):
+    """Creates a ``GNLSESetup`` object described in a configuration.
+
+    Parameters
+    ----------
+    config : dict
+        Configuration of a single simulation, without ``sweep``.
+
+    Returns
+    -------
+    setup : GNLSESetup
+        Model inputs.
+    """
+
+    setup = GNLSESetup()
+    for key, value in config.items():
+        if not hasattr(setup, key):
+            raise ValueError("unknown setup parameter '%s'" % key)
+        if key == 'raman_model' and isinstance(value, str):
+            name = value[len('raman_'):] if value.startswith('raman_') \
+                else value
+            if name not in RAMAN_MODELS:
+                raise ValueError("unknown Raman model '%s'" % value)
+            value = RAMAN_MODELS[name]
+        setattr(setup, key, build_model(value))
+    return setup
+
+
+def _set_path(config, path, value):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        config = config[key]
+    config[keys[-1]] = value
+
+
+def expand_sweep(config):
+    """Expands a configuration with a ``sweep`` into single simulations.
+
+    Parameters
+    ----------
+    config : dict
+        Configuration, optionally with a ``sweep`` dictionary mapping dotted
+        paths of parameters to lists of their values.
+
+    Returns
+    -------
+    list of (dict, dict)
+        Swept parameter values and configuration for every combination.
+    """
+
+    config = dict(config)
+    sweep = config.pop('sweep', None) or {}
+    paths = list(sweep)
+
+    runs = []
+    for values in itertools.product(*(sweep[path] for path in paths)):
+        run = copy.deepcopy(config)
+        for path, value in zip(paths, values):
+            _set_path(run, path, value)
+        runs.append((dict(zip(paths, values)), run))
+    return runs
@@ -4,7 +4,13 @@ Based on delivered frequency vector and damping indexes
 script calculates linear dispersion operator in
 frequency domain.
 
+Models also evaluate whole batches of parameter sets at once into arrays
+of operators, one row per set, e.g. for sweeps over fiber designs or for
+``gnlse.JaxGNLSE.run_batch``.
+
 """
+import math
+
 import numpy as np
 from scipy import interpolate
 
@@ -65,12 +71,40 @@ class DispersionFiberFromTaylor(Dispersion):
     def D(self, V):
         # Damping
         self.calc_loss()
-        # Taylor series for subsequent derivatives
-        # of constant propagation
-        B = sum(beta / np.math.factorial(i + 2) * V**(i + 2)
-                for i, beta in enumerate(self.betas))
-        L = 1j * B - self.alpha / 2
-        return L
+        return self.D_batch(V, self.betas, self.loss)
+
+    @staticmethod
+    def D_batch(V, betas, loss=0):
+        """Calculate linear dispersion operators for a batch of Taylor
+        expansions at once.
+
+        Parameters
+        ----------
+        V : ndarray, (N)
+            Frequency vector
+        betas : ndarray, (M) or (K, M)
+            Derivatives of constant propagations at pump wavelength of
+            every member of the batch [ps^2/m, ..., ps^n/m]
+        loss : float or ndarray, (K)
+            Loss factors [dB/m]
+
+        Returns
+        -------
+        ndarray, (N) or (K, N)
+            Linear dispersion operators in frequency domain
+        """
+
+        betas = np.asarray(betas, dtype=float)
+        # Taylor series for subsequent derivatives of constant propagation
+        # in Horner form, sum(beta_i / (i + 2)! * V**i) * V**2
+        coefficients = betas / np.array(
+            [math.factorial(i + 2) for i in range(betas.shape[-1])])
+        B = np.zeros(betas.shape[:-1] + np.shape(V))
+        for coefficient in np.moveaxis(coefficients, -1, 0)[::-1]:
+            B = B * V + np.asarray(coefficient)[..., np.newaxis]
+        B = B * V**2
+        alpha = np.log(10**(np.asarray(loss, dtype=float) / 10))
+        return 1j * B - np.asarray(alpha)[..., np.newaxis] / 2
 
 
 class DispersionFiberFromInterpolation(Dispersion):
@@ -100,34 +134,130 @@ class DispersionFiberFromInterpolation(Dispersion):
         self.lambdas = lambdas
         # Central frequency in [1/ps = THz]
         self.w0 = (2.0 * np.pi * c) / central_wavelength
+        self._spline = None
+        self._spline_data = None
 
-    def D(self, V):
-        # Central frequency [1/ps = THz]
-        omega = 2 * np.pi * c / self.lambdas
-        dOmega = V[1] - V[0]
-        Bet = self.neff * omega / c * 1e9  # [1/m]
-
-        # Extrapolate betas for a frequency vector
-        fun_interpolation = interpolate.interp1d(omega,
-                                                 Bet,
-                                                 kind='cubic',
-                                                 fill_value="extrapolate")
+    @staticmethod
+    def _fit(neff, lambdas):
+        """Cubic spline of propagation constants over angular frequency,
+        extrapolated beyond the data, as ``interp1d(kind='cubic')``."""
+        # Angular frequencies [1/ps = THz]
+        omega = 2 * np.pi * c / np.asarray(lambdas, dtype=float)
+        Bet = np.asarray(neff) * omega / c * 1e9  # [1/m]
+        order = np.argsort(omega)
+        return interpolate.make_interp_spline(
+            omega[order], np.take(Bet, order, axis=-1), k=3, axis=-1)
 
-        B = fun_interpolation(V + self.w0)
+    @staticmethod
+    def _operator(spline, V, w0, loss):
+        dOmega = V[1] - V[0]
+        B = spline(V + w0)
         # Propagation constant at central frequency [1/m]
-        B0 = fun_interpolation(self.w0)
+        B0 = spline(w0)
         # Value of propagation at a lower end of interval [1/m]
-        B0plus = fun_interpolation(self.w0 + dOmega)
+        B0plus = spline(w0 + dOmega)
         # Value of propagation at a higher end of interval [1/m]
-        B0minus = fun_interpolation(self.w0 - dOmega)
+        B0minus = spline(w0 - dOmega)
 
         # Difference quotient, approximation of
         # derivative of a function at a point [ps/m]
         B1 = (B0plus - B0minus) / (2 * dOmega)
 
         # Damping
-        self.calc_loss()
+        alpha = np.log(10**(np.asarray(loss, dtype=float) / 10))
 
         # Linear dispersion operator
-        L = 1j * (B - (B0 + B1 * V)) - self.alpha / 2
-        return L
+        return 1j * (B - (B0[..., np.newaxis] + B1[..., np.newaxis] * V)) \
+            - np.asarray(alpha)[..., np.newaxis] / 2
+
+    def D(self, V):
+        # The spline is fitted once and refitted only if the data change
+        data = (self.neff, self.lambdas)
+        if self._spline is None or self._spline_data[0] is not data[0] \
+                or self._spline_data[1] is not data[1]:
+            self._spline = self._fit(*data)
+            self._spline_data = data
+        self.calc_loss()
+        return self._operator(self._spline, V, self.w0, self.loss)
+
+    @classmethod
+    def D_batch(cls, V, neff, lambdas, central_wavelength, loss=0):
+        """Calculate linear dispersion operators for a batch of effective
+        refractive indices given at common wavelengths.
+
+        Parameters
+        ----------
+        V : ndarray, (N)
+            Frequency vector
+        neff : ndarray, (K, L)
+            Effective refractive indices of every member of the batch
+        lambdas : ndarray, (L)
+            Wavelengths corresponding to refractive indices [nm]
+        central_wavelength : float
+            Wavelength corresponding to pump wavelength [nm]
+        loss : float or ndarray, (K)
+            Loss factors [dB/m]
+
+        Returns
+        -------
+        ndarray, (K, N)
+            Linear dispersion operators in frequency domain
+        """
+
+        w0 = (2.0 * np.pi * c) / central_wavelength
+        return cls._operator(cls._fit(neff, lambdas), V, w0, loss)
+
+
+class DispersionFiberAlongZ(Dispersion):
+    """Dispersion operator of a longitudinally varying fiber, e.g. a taper.
+
+    Local dispersion models are given at a set of positions along the fiber.
+    Every model is evaluated only once for the simulation frequency grid and
+    the operator between the positions is interpolated linearly from that
+    table, so nothing is recalculated during integration.
+
+    Attributes
+    -----------
+    z : ndarray (K)
+        Increasing positions along the fiber [m]
+    models : list of Dispersion (K)
+        Local dispersion models at the positions ``z``. Beyond the first
+        and the last position the fiber is assumed to be uniform.
+    """
+
+    def __init__(self, z, models):
+        self.z = np.asarray(z, dtype=float)
+        self.models = list(models)
+
+        if self.z.ndim != 1 or len(self.z) != len(self.models):
+            raise ValueError("'z' and 'models' must have the same length")
+        if len(self.z) == 0:
+            raise ValueError("at least one dispersion model is required")
+        if np.any(np.diff(self.z) <= 0):
+            raise ValueError("'z' must be strictly increasing")
+
+    def D(self, V):
+        """Linear dispersion operator at the fiber input."""
+        return self.D_table(V)[0]
+
+    def D_table(self, V):
+        """Calculate linear dispersion operators at all positions ``z``.
+
+        Parameters
+        ----------
+        V : ndarray, (N)
+            Frequency vector
+
+        Returns
+        -------
+        ndarray, (K, N)
+            Linear dispersion operators in frequency domain
+        """
+
+        models = self.models
+        if all(type(model) is DispersionFiberFromTaylor for model in models) \
+                and len({np.size(model.betas) for model in models}) == 1:
+            return DispersionFiberFromTaylor.D_batch(
+                V, [np.ravel(model.betas) for model in models],
+                [model.loss for model in models])
+        return np.array([model.D(V) for model in models])
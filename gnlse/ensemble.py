@@ -0,0 +1,138 @@
+"""Statistics of ensembles of noisy simulations.
+
+Spectral statistics of many realizations, e.g. with the one-photon-per-mode
+input noise of ``gnlse.noise``, are accumulated realization by realization,
+so that memory does not grow with the size of the ensemble. The mean
+spectrum and its variance are updated with Welford's algorithm, and the
+first-order degree of coherence [DGC06]_
+
+.. math::
+
+   \\left|g_{12}^{(1)}(\\omega)\\right| = \\left|
+   \\frac{\\langle A_i^*(\\omega) A_j(\\omega) \\rangle_{i \\neq j}}
+   {\\langle |A(\\omega)|^2 \\rangle} \\right|
+
+is obtained from the sums of the fields and of their squared moduli, as
+the sum over all pairs of distinct realizations equals
+:math:`|\\sum_i A_i|^2 - \\sum_i |A_i|^2`.
+
+"""
+
+import numpy as np
+
+
+class EnsembleStatistics(object):
+    """Accumulator of spectral statistics of an ensemble of realizations.
+
+    Attributes
+    ----------
+    count : int
+        Number of accumulated realizations.
+    W : ndarray, (n,)
+        Absolute angular frequency grid, taken from the first solution.
+    Z : ndarray, (m,)
+        Points at which intermediate steps were saved.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.W = None
+        self.Z = None
+        self.field_sum = None
+        self.mean = None
+        self.m2 = None
+
+    def update(self, solution):
+        """Adds realizations to the ensemble.
+
+        Parameters
+        ----------
+        solution : Solution or ndarray
+            A ``Solution`` object, a spectrum ``AW`` of shape (m, n) or
+            (n,), or a batch of spectra of shape (k, m, n).
+        """
+
+        if hasattr(solution, 'AW'):
+            if self.W is None:
+                self.W = solution.W
+                self.Z = solution.Z
+            AW = np.asarray(solution.AW)[np.newaxis]
+        else:
+            AW = np.asarray(solution)
+            if AW.ndim < 3:
+                AW = AW[np.newaxis]
+
+        for field in AW:
+            intensity = np.abs(field)**2
+            if self.count == 0:
+                self.field_sum = np.zeros(field.shape, dtype=complex)
+                self.mean = np.zeros(intensity.shape)
+                self.m2 = np.zeros(intensity.shape)
+
+            self.count += 1
+            self.field_sum += field
+            delta = intensity - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (intensity - self.mean)
+
+    def merge(self, other):
+        """Adds realizations accumulated by another ``EnsembleStatistics``
+        object, e.g. in a different process.
+
+        Parameters
+        ----------
+        other : EnsembleStatistics
+            Statistics of other realizations of the same simulation.
+        """
+
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.W = other.W
+            self.Z = other.Z
+            self.count = other.count
+            self.field_sum = other.field_sum.copy()
+            self.mean = other.mean.copy()
+            self.m2 = other.m2.copy()
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.field_sum += other.field_sum
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+
+    @property
+    def spectrum(self):
+        """Mean spectral intensity, ndarray (m, n)."""
+        return self.mean
+
+    @property
+    def variance(self):
+        """Sample variance of the spectral intensity, ndarray (m, n)."""
+        if self.count < 2:
+            raise ValueError("at least two realizations are required")
+        return self.m2 / (self.count - 1)
+
+    @property
+    def rin(self):
+        """Relative intensity noise, the standard deviation of the spectral
+        intensity relative to its mean, ndarray (m, n)."""
+        rin = np.zeros(self.mean.shape)
+        np.divide(np.sqrt(self.variance), self.mean, out=rin,
+                  where=self.mean > 0)
+        return rin
+
+    @property
+    def coherence(self):
+        """Modulus of the first-order degree of coherence,
+        ndarray (m, n)."""
+        if self.count < 2:
+            raise ValueError("at least two realizations are required")
+        intensity_sum = self.count * self.mean
+        pairs = (np.abs(self.field_sum)**2 - intensity_sum) \
+            / (self.count * (self.count - 1))
+        g12 = np.zeros(self.mean.shape)
+        np.divide(np.abs(pairs), self.mean, out=g12, where=self.mean > 0)
+        return g12
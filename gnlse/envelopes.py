@@ -7,6 +7,8 @@ hyperbolic secant, gaussian and lorentzian.
 
 import numpy as np
 
+from gnlse.noise import random_phases
+
 
 class Envelope(object):
     def A(T):
@@ -123,12 +125,17 @@ class CWEnvelope(Envelope):
         Peak power [W].
     Pn : float, optional
         Peak power for noise [W].
+    seed : int, SeedSequence or Generator, optional
+        Seed of the random phases of the noise, see
+        ``gnlse.noise.random_phases``. The global ``numpy.random`` state is
+        used if ``None``.
     """
 
-    def __init__(self, Pmax, Pn=0):
+    def __init__(self, Pmax, Pn=0, seed=None):
         self.name = 'Continious Wave'
         self.Pmax = Pmax
         self.Pn = Pn
+        self.seed = seed
 
     def A(self, T):
         """
@@ -146,7 +153,9 @@ class CWEnvelope(Envelope):
         cw = np.fft.ifft(np.sqrt(self.Pmax) * np.ones(np.size(T)))
         noise = 0
         if self.Pn:
-            noise = np.sqrt(self.Pn
-                            ) * np.exp(
-                1j * 2 * np.pi * np.random.rand(np.size(T)))
+            if self.seed is None:
+                phases = 2 * np.pi * np.random.rand(np.size(T))
+            else:
+                phases = random_phases(np.size(T), seed=self.seed)[0]
+            noise = np.sqrt(self.Pn) * np.exp(1j * phases)
         return np.fft.fft(cw + noise)
@@ -1,10 +1,156 @@
+import asyncio
+import concurrent.futures
+import threading
+
 import numpy as np
 import scipy.integrate
 import pyfftw
 import tqdm
 
 from gnlse.common import c
-from gnlse.import_export import write_mat, read_mat
+from gnlse.import_export import LazyFile, read_file, write_file
+from gnlse.integrators import ConservedQuantityRK4
+
+# Integration methods of scipy.integrate.solve_ivp accepted by name
+METHODS = {
+    'RK23': scipy.integrate.RK23,
+    'RK45': scipy.integrate.RK45,
+    'DOP853': scipy.integrate.DOP853,
+    'Radau': scipy.integrate.Radau,
+    'BDF': scipy.integrate.BDF,
+    'LSODA': scipy.integrate.LSODA,
+    'CQE': ConservedQuantityRK4,
+}
+
+# Prefix of the names of traces stored in files
+TRACE_PREFIX = 'trace_'
+
+
+class OperatorTable:
+    """
+    Operator tabulated at positions along the fiber.
+
+    Rows of the table are interpolated linearly between the positions and
+    held constant outside of them. The integral of the interpolant, needed
+    for the interaction picture of a longitudinally varying fiber, is
+    evaluated in closed form from precomputed partial sums.
+
+    Attributes
+    ----------
+    z : ndarray, (k,)
+        Increasing positions along the fiber.
+    table : ndarray, (k,) or (k, n)
+        Operator values at positions ``z``.
+    """
+
+    def __init__(self, z, table):
+        self.z = np.asarray(z, dtype=float)
+        self.table = np.asarray(table)
+
+        # Integral of the operator from 0 up to each position
+        h = np.diff(self.z).reshape((-1,) + (1,) * (self.table.ndim - 1))
+        self.partial = np.concatenate((
+            [self.table[0] * self.z[0]],
+            self.table[0] * self.z[0] + np.cumsum(
+                h * (self.table[:-1] + self.table[1:]) / 2, axis=0)))
+
+    def _locate(self, z):
+        k = np.searchsorted(self.z, z, side='right') - 1
+        return min(max(k, 0), len(self.z) - 2)
+
+    def value(self, z):
+        """Operator at position ``z``."""
+        if len(self.z) == 1 or z <= self.z[0]:
+            return self.table[0]
+        if z >= self.z[-1]:
+            return self.table[-1]
+        k = self._locate(z)
+        s = (z - self.z[k]) / (self.z[k + 1] - self.z[k])
+        return (1 - s) * self.table[k] + s * self.table[k + 1]
+
+    def integral(self, z):
+        """Integral of the operator from 0 to position ``z``."""
+        if len(self.z) == 1 or z <= self.z[0]:
+            return self.table[0] * z
+        if z >= self.z[-1]:
+            return self.partial[-1] + self.table[-1] * (z - self.z[-1])
+        k = self._locate(z)
+        h = self.z[k + 1] - self.z[k]
+        s = z - self.z[k]
+        return (self.partial[k] + self.table[k] * s
+                + (self.table[k + 1] - self.table[k]) * s**2 / (2 * h))
+
+
+class FieldInterpolant:
+    """
+    Field at any distance, interpolated between the accepted steps of the
+    integrator.
+
+    The field is interpolated in the interaction picture, where it varies
+    slowly, by quartic polynomials matching the state and its derivative at
+    both ends of every step and the dense output of the integrator at its
+    middle, and then transformed back.
+
+    Attributes
+    ----------
+    z : ndarray, (k,)
+        Distances of the ends of the steps [m].
+    y : ndarray, (k, n)
+        Field in the interaction picture at distances ``z``.
+    f : ndarray, (k, n)
+        Derivative of ``y`` with respect to the distance.
+    m : ndarray, (k - 1, n)
+        Field in the interaction picture in the middle of every step.
+    phase : OperatorTable
+        Linear operator of the interaction picture, in the order of the
+        discrete Fourier transform.
+    scale : ndarray, (n,) or float
+        Scaling of the field in the interaction picture.
+    dt : float
+        Step of the time grid [ps].
+    """
+
+    def __init__(self, z, y, f, m, phase, scale, dt):
+        self.z = np.asarray(z, dtype=float)
+        self.y = np.asarray(y)
+        self.f = np.asarray(f)
+        self.m = np.asarray(m)
+        self.phase = phase
+        self.scale = scale
+        self.dt = dt
+
+    def __call__(self, z):
+        """
+        Field at distance ``z``.
+
+        Returns
+        -------
+        At : ndarray, (n,)
+            Field in the time domain.
+        AW : ndarray, (n,)
+            Field in the frequency domain.
+        """
+        if not self.z[0] <= z <= self.z[-1]:
+            raise ValueError("distance %g m is out of the range of the "
+                             "solution" % z)
+        k = min(np.searchsorted(self.z, z, side='right') - 1,
+                len(self.z) - 2)
+        if len(self.z) == 1:
+            y = self.y[0]
+        else:
+            h = self.z[k + 1] - self.z[k]
+            s = (z - self.z[k]) / h
+            # Cubic Hermite interpolant corrected by a term vanishing with
+            # its derivative at both ends to match the middle
+            cubic = [(2 * s**3 - 3 * s**2 + 1), (s**3 - 2 * s**2 + s) * h,
+                     (-2 * s**3 + 3 * s**2), (s**3 - s**2) * h]
+            middle = (self.y[k] + self.y[k + 1]) / 2 \
+                + h / 8 * (self.f[k] - self.f[k + 1])
+            y = (cubic[0] * self.y[k] + cubic[1] * self.f[k]
+                 + cubic[2] * self.y[k + 1] + cubic[3] * self.f[k + 1]
+                 + 16 * s**2 * (1 - s)**2 * (self.m[k] - middle))
+        AW = y * np.exp(self.phase.integral(z)) / self.scale
+        return np.fft.fft(AW), np.fft.fftshift(AW) * len(AW) * self.dt
 
 
 class GNLSESetup:
@@ -25,22 +171,50 @@ class GNLSESetup:
     z_saves : int
         Number of snapshots to save along the fiber. Larger numbers require
         more memory to store the result.
-    nonlinearity : float [1/W/m]
-        Effective nonlinearity.
+    nonlinearity : float [1/W/m] or Nonlinearity
+        Effective nonlinearity. Models providing ``gamma_table``, such as
+        ``NonlinearityAlongZ``, describe a longitudinally varying fiber.
     pulse_model : Envelope
         Input pulse envelope model.
     dispersion_model : Dispersion, optional
         Fiber dispersion model or ``None`` to model a dispersionless fiber.
+        Models providing ``D_table``, such as ``DispersionFiberAlongZ``,
+        describe a longitudinally varying fiber.
     raman_model : function, optional
         Raman scattering model or ``None`` if the effect is to be neglected.
     self_steepning : bool, optional
         Whether to include the effect of self-steepening. Disabled by default.
+    time_boundary : SuperGaussianBoundary, optional
+        Absorbing layers at the edges of the time window or ``None`` for
+        a periodic window.
+    frequency_boundary : SuperGaussianBoundary, optional
+        Absorbing layers at the edges of the frequency window or ``None``
+        for a periodic window.
+    moving_frame : float, optional
+        Largest delay of the energy centroid of the field from the center
+        of the time window, relative to the window, before the window is
+        re-centered on the centroid. ``None`` for a fixed frame (default).
     rtol : float, optional
-        Relative tolerance passed to the ODE solver.
+        Relative tolerance passed to the ODE solver. For the ``'CQE'``
+        method it is the goal of relative change of the photon number per
+        step.
     atol : float, optional
         Absolute tolerance passed to the ODE solver.
-    method : str, optional
-        Integration method passed to the ODE solver.
+    first_step : float, optional
+        Initial step size [m], e.g. ``stats['median_step']`` of the
+        solution of a similar setup, or ``None`` to let the ODE solver
+        choose it.
+    method : str or OdeSolver, optional
+        Integration method: name of a ``scipy.integrate.solve_ivp`` method,
+        ``'CQE'`` for step size control by the photon number
+        (``gnlse.integrators.ConservedQuantityRK4``) or a subclass of
+        ``scipy.integrate.OdeSolver``.
+    error_norm : SpectralErrorNorm, optional
+        Error norm adapting the absolute tolerance to the current spectrum,
+        e.g. ignoring empty spectral bins, or ``None`` to use ``atol``
+        uniformly.
+    progress_bar : bool, optional
+        Whether to display the progress of integration. Enabled by default.
     """
 
     def __init__(self):
@@ -55,10 +229,16 @@ class GNLSESetup:
         self.dispersion_model = None
         self.raman_model = None
         self.self_steepening = False
+        self.time_boundary = None
+        self.frequency_boundary = None
+        self.moving_frame = None
 
         self.rtol = 1e-3
         self.atol = 1e-4
+        self.first_step = None
         self.method = 'RK45'
+        self.error_norm = None
+        self.progress_bar = True
 
 
 class Solution:
@@ -77,34 +257,75 @@ class Solution:
         Intermediate steps in the time domain.
     AW : ndarray, (n, m)
         Intermediate steps in the frequency domain.
+    stats : dict
+        Statistics of the ODE solver: the number of evaluations of the right
+        hand side (``nfev``) and of accepted steps (``steps``), the
+        relative drift of the photon number at the fiber output (``drift``),
+        or of the energy if self-steepening is neglected, the energy
+        absorbed by the boundaries of the grids (``absorbed``) [pJ] and the
+        first accepted step size (``first_step``) [m] and the median
+        accepted step size (``median_step``) [m], which warm-starts runs
+        of similar setups.
+    offset : ndarray, (m,)
+        Delay of the center of the time window of every slice in a moving
+        frame [ps], or ``None`` for a fixed frame. The delays of slice
+        ``k`` are ``t + offset[k]``.
+    traces : dict
+        Results of reducers evaluated on every slice, see
+        ``gnlse.reducers``, as arrays whose first axis runs along ``Z``,
+        or ``None`` if no reducers were given.
+    dense : FieldInterpolant
+        Interpolant of the field between accepted steps of the integrator,
+        or ``None`` if dense output was not requested.
     """
 
     def __init__(self, t=None, W=None, w_0=None, Z=None, At=None, AW=None,
-                 Aty=None, AWy=None):
+                 Aty=None, AWy=None, stats=None, offset=None, traces=None,
+                 dense=None):
         self.t = t
         self.W = W
         self.w_0 = w_0
         self.Z = Z
         self.At = At
         self.AW = AW
+        self.stats = stats
+        self.offset = offset
+        self.traces = traces
+        self.dense = dense
 
-    def to_file(self, path):
+    def to_file(self, path, **kwargs):
         """
-        Saves a solution to a file.
+        Saves a solution to a file. The format is chosen by extension:
+        MATLAB compatible ``.mat`` (default), chunked and compressed HDF5
+        (``.h5``, ``.hdf5``), zarr directory store (``.zarr``) or numpy
+        archive (``.npz``).
 
         Parameters
         ----------
         path : str
             Path to file.
+        **kwargs
+            Format specific options, see ``gnlse.import_export``.
         """
 
-        data = {'t': self.t, 'W': self.W, 'Z': self.Z, 'At': self.At,
-                'AW': self.AW}
-        write_mat(data, path)
+        data = {'t': self.t, 'W': self.W, 'w_0': self.w_0, 'Z': self.Z,
+                'At': self.At, 'AW': self.AW}
+        if self.offset is not None:
+            data['offset'] = self.offset
+        if self.traces is not None:
+            for name, trace in self.traces.items():
+                data[TRACE_PREFIX + name] = trace
+        if self.dense is not None:
+            data.update({'dense_z': self.dense.z, 'dense_y': self.dense.y,
+                         'dense_f': self.dense.f, 'dense_m': self.dense.m,
+                         'dense_phase_z': self.dense.phase.z,
+                         'dense_phase': self.dense.phase.table,
+                         'dense_scale': self.dense.scale})
+        write_file(data, path, **kwargs)
 
     def from_file(self, path):
         """
-        Load a solution from file.
+        Load a solution from file. The format is chosen by extension.
 
         Parameters
         ----------
@@ -112,12 +333,173 @@ class Solution:
             Path to file.
         """
 
-        data = read_mat(path)
+        data = read_file(path)
         self.t = data['t']
         self.W = data['W']
+        self.w_0 = data.get('w_0')
         self.Z = data['Z']
-        self.At = data['At']
-        self.AW = data['AW']
+        self.At = data.get('At')
+        self.AW = data.get('AW')
+        self.offset = data.get('offset')
+        self.traces = _traces(data)
+        self.dense = _dense(data, self.t)
+
+    def field(self, z):
+        """
+        Field at any distances, reconstructed from the dense output.
+
+        Parameters
+        ----------
+        z : float or ndarray, (m,)
+            Distances [m].
+
+        Returns
+        -------
+        At : ndarray, (n,) or (m, n)
+            Field in the time domain.
+        AW : ndarray, (n,) or (m, n)
+            Field in the frequency domain.
+        """
+
+        if self.dense is None:
+            raise ValueError("solution has no dense output, run with "
+                             "'dense_output=True'")
+        if np.ndim(z) == 0:
+            return self.dense(z)
+        At, AW = zip(*(self.dense(z_k) for z_k in z))
+        return np.array(At), np.array(AW)
+
+    def resample(self, Z):
+        """
+        Solution with slices at given distances, reconstructed from the
+        dense output, e.g. a finely sampled propagation map.
+
+        Parameters
+        ----------
+        Z : ndarray, (m,)
+            Distances of slices [m].
+
+        Returns
+        -------
+        Solution
+            Solution with slices at distances ``Z``.
+        """
+
+        Z = np.asarray(Z, dtype=float)
+        At, AW = self.field(Z)
+        return Solution(self.t, self.W, self.w_0, Z, At, AW,
+                        stats=self.stats, dense=self.dense)
+
+
+def _traces(data):
+    """Traces stored among variables of a file, or ``None``."""
+    traces = {key[len(TRACE_PREFIX):]: np.asarray(data[key])
+              for key in data.keys() if key.startswith(TRACE_PREFIX)}
+    return traces or None
+
+
+def _dense(data, t):
+    """Interpolant stored among variables of a file, or ``None``."""
+    if 'dense_z' not in data:
+        return None
+    phase = OperatorTable(np.ravel(data['dense_phase_z']),
+                          np.asarray(data['dense_phase']))
+    scale = data['dense_scale']
+    if np.ndim(scale) > 0:
+        scale = np.ravel(scale)
+    return FieldInterpolant(np.ravel(data['dense_z']),
+                            np.asarray(data['dense_y']),
+                            np.asarray(data['dense_f']),
+                            np.asarray(data['dense_m']), phase, scale,
+                            t[1] - t[0])
+
+
+def _window(grid, value_range, step):
+    """Slice of an ascending grid covering the given range of values."""
+    if value_range is None:
+        return slice(None, None, step)
+    start = np.searchsorted(grid, value_range[0], side='left')
+    stop = np.searchsorted(grid, value_range[1], side='right')
+    return slice(start, stop, step)
+
+
+class LazySolution(Solution):
+    """
+    Solution stored in a file, read on demand.
+
+    The grids are read when the file is opened, while ``At`` and ``AW`` are
+    array-like objects reading only the requested part of the data when
+    sliced, e.g. ``solution.AW[-1]`` reads the output spectrum alone. HDF5
+    and zarr files are read chunk by chunk and uncompressed \\*.npz files
+    are memory-mapped. Other files are loaded completely.
+
+    Parameters
+    ----------
+    path : str
+        Path to file.
+    """
+
+    def __init__(self, path):
+        self.file = LazyFile(path)
+        super().__init__(t=np.ravel(self.file['t']),
+                         W=np.ravel(self.file['W']),
+                         w_0=self.file.get('w_0'),
+                         Z=np.ravel(self.file['Z']),
+                         At=self.file.get('At'),
+                         AW=self.file.get('AW'))
+        if 'offset' in self.file:
+            self.offset = np.ravel(self.file['offset'])
+        self.traces = _traces(self.file)
+        self.dense = _dense(self.file, self.t)
+
+    def select(self, z_range=None, time_range=None, frequency_range=None,
+               z_step=1, step=1):
+        """
+        Reads part of the solution into memory.
+
+        Parameters
+        ----------
+        z_range : list, (2, ), optional
+            Range of distances [m]. Whole fiber by default.
+        time_range : list, (2, ), optional
+            Range of delays [ps]. Whole time window by default.
+        frequency_range : list, (2, ), optional
+            Range of frequencies relative to the central one [THz]. Whole
+            bandwidth by default.
+        z_step : int, optional
+            Stride of the selected distances.
+        step : int, optional
+            Stride of the selected time and frequency points.
+
+        Returns
+        -------
+        solution : Solution
+            Selected part of the solution in the form of a ``Solution``
+            object.
+        """
+
+        w_0 = 0 if self.w_0 is None else self.w_0
+        zi = _window(self.Z, z_range, z_step)
+        ti = _window(self.t, time_range, step)
+        wi = _window((self.W - w_0) / 2 / np.pi, frequency_range, step)
+
+        offset = None if self.offset is None else self.offset[zi]
+        traces = None if self.traces is None else {
+            name: trace[zi] for name, trace in self.traces.items()}
+        At = None if self.At is None else np.asarray(self.At[zi, ti])
+        AW = None if self.AW is None else np.asarray(self.AW[zi, wi])
+        return Solution(self.t[ti], self.W[wi], self.w_0, self.Z[zi], At, AW,
+                        offset=offset, traces=traces)
+
+    def close(self):
+        """Closes the underlying file."""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 class GNLSE:
@@ -125,6 +507,11 @@ class GNLSE:
     Models propagation of an optical pulse in a fiber by integrating
     the generalized non-linear Schrödinger equation.
 
+    The operators of the fiber are read-only after creation, FFT buffers
+    and plans are kept per thread and the state of a propagation is local
+    to it, so that a single object propagates pulses in many threads at
+    once.
+
     Attributes
     ----------
     setup : GNLSESetup
@@ -151,7 +538,13 @@ class GNLSE:
         self.z_saves = setup.z_saves
         self.rtol = setup.rtol
         self.atol = setup.atol
+        self.first_step = setup.first_step
         self.method = setup.method
+        self.error_norm = setup.error_norm
+        self.progress_bar = setup.progress_bar
+        self.moving_frame = setup.moving_frame
+        # FFT buffers and plans of every thread
+        self._local = threading.local()
         self.N = setup.resolution
 
         # Time domain grid
@@ -175,7 +568,17 @@ class GNLSE:
         self.W = np.fft.fftshift(W)
 
         # Nonlinearity
-        if hasattr(setup.nonlinearity, 'gamma'):
+        self.gamma_table = None
+        if hasattr(setup.nonlinearity, 'gamma_table'):
+            # in case of longitudinally varying nonlinearity
+            gamma, self.scale = setup.nonlinearity.gamma_table(self.V)
+            if gamma.ndim > 1:
+                gamma = np.fft.fftshift(gamma, axes=-1)
+                self.scale = np.fft.fftshift(self.scale)
+            self.gamma_table = OperatorTable(setup.nonlinearity.z,
+                                             gamma / self.w_0)
+            self.gamma = self.gamma_table.value(0)
+        elif hasattr(setup.nonlinearity, 'gamma'):
             # in case in of frequency dependent nonlinearity
             gamma, self.scale = setup.nonlinearity.gamma(self.V)
             self.gamma = gamma / self.w_0
@@ -196,36 +599,106 @@ class GNLSE:
                 self.RW = self.N * np.fft.ifft(
                     np.fft.fftshift(np.transpose(RT)))
 
+        # Absorbing boundaries
+        self.time_absorption = None
+        if setup.time_boundary is not None:
+            self.time_absorption = setup.time_boundary.rate(
+                self.t, self.fiber_length)
+        self.frequency_absorption = None
+        if setup.frequency_boundary is not None:
+            self.frequency_absorption = np.fft.fftshift(
+                setup.frequency_boundary.rate(self.V, self.fiber_length))
+
         # Dispersion operator
-        if setup.dispersion_model:
+        self.dispersion_table = None
+        if hasattr(setup.dispersion_model, 'D_table'):
+            # in case of longitudinally varying dispersion
+            self.dispersion_table = OperatorTable(
+                setup.dispersion_model.z,
+                np.fft.fftshift(setup.dispersion_model.D_table(self.V),
+                                axes=-1))
+            self.D = np.fft.ifftshift(self.dispersion_table.value(0))
+        elif setup.dispersion_model:
             self.D = setup.dispersion_model.D(self.V)
         else:
             self.D = np.zeros(self.V.shape)
+        # Dispersion operator in the order of the discrete Fourier transform
+        self._D = np.fft.fftshift(self.D)
 
         # Input pulse
-        if hasattr(setup.pulse_model, 'A'):
-            self.A = setup.pulse_model.A(self.t)
-        else:
-            self.A = setup.pulse_model
+        self.A = self._input(setup.pulse_model)
+
+        # FFT plans of the creating thread, reused by its propagations
+        self._plans()
+
+    def _plans(self):
+        """FFT buffers and plans of the current thread."""
+        local = self._local
+        if not hasattr(local, 'plans'):
+            x = pyfftw.empty_aligned(self.N, dtype="complex128")
+            X = pyfftw.empty_aligned(self.N, dtype="complex128")
+            local.plans = (x, X, pyfftw.FFTW(x, X),
+                           pyfftw.FFTW(X, x, direction="FFTW_BACKWARD"))
+        return local.plans
 
-    def run(self):
+    def _input(self, pulse):
+        """Input field on the time grid from an envelope or an array."""
+        if hasattr(pulse, 'A'):
+            return pulse.A(self.t)
+        return pulse
+
+    def _linear_phase(self, z):
         """
-        Solve one mode GNLSE equation described by the given
-        ``GNLSESetup`` object.
+        Integral of the dispersion operator from the fiber input to ``z``.
+        """
+        if self.dispersion_table is not None:
+            return self.dispersion_table.integral(z)
+        return self._D * z
 
-        Returns
-        -------
-        setup : Solution
-            Simulation results in the form of a ``Solution`` object.
+    def _centroid(self, z, AW):
+        """
+        Delay of the energy centroid of the field at ``z`` [ps], averaged
+        on the circle of the periodic time window.
+        """
+        period = self.N * (self.t[1] - self.t[0])
+        x = AW * np.exp(self._linear_phase(z)) / self.scale
+        intensity = np.abs(np.fft.fft(x))**2
+        angle = np.angle(np.sum(
+            intensity * np.exp(2j * np.pi * self.t / period)))
+        return angle * period / (2 * np.pi)
+
+    def _transform(self, z, AW, At_out, AW_out, i):
+        """
+        Transforms a slice from the interaction picture and writes it into
+        ``i``-th rows of the output arrays.
+        """
+        dt = self.t[1] - self.t[0]
+        AW = AW * np.exp(self._linear_phase(z)) / self.scale
+        At_out[i] = np.fft.fft(AW)
+        AW_out[i] = np.fft.fftshift(AW) * self.N * dt
+
+    def _integrate(self, A=None, nodes=None):
         """
+        Integrates the equation in the interaction picture for the input
+        field ``A`` (the input of the setup by default), yielding saved
+        slices ``(z, AW, offset)``, with the delay of the window in a moving
+        frame, and returning statistics of the ODE solver. The ends of
+        accepted steps are appended to the list ``nodes`` if given.
+        """
+        if A is None:
+            A = self.A
         dt = self.t[1] - self.t[0]
-        self.D = np.fft.fftshift(self.D)
-        x = pyfftw.empty_aligned(self.N, dtype="complex128")
-        X = pyfftw.empty_aligned(self.N, dtype="complex128")
-        plan_forward = pyfftw.FFTW(x, X)
-        plan_inverse = pyfftw.FFTW(X, x, direction="FFTW_BACKWARD")
+        V = np.fft.fftshift(self.V)
+        x, X, plan_forward, plan_inverse = self._plans()
+
+        progress_bar = tqdm.tqdm(total=self.fiber_length, unit='m',
+                                 disable=not self.progress_bar)
 
-        progress_bar = tqdm.tqdm(total=self.fiber_length, unit='m')
+        if self.gamma_table is not None:
+            gamma = self.gamma_table.value
+        else:
+            def gamma(z):
+                return self.gamma
 
         def rhs(z, AW):
             """
@@ -235,7 +708,8 @@ class GNLSE:
             progress_bar.n = round(z, 3)
             progress_bar.update(0)
 
-            x[:] = AW * np.exp(self.D * z)
+            phase = np.exp(self._linear_phase(z))
+            x[:] = AW * phase
             At = plan_forward().copy()
             IT = np.abs(At)**2
 
@@ -251,30 +725,361 @@ class GNLSE:
                 X[:] = At * IT
                 M = plan_inverse()
 
-            rv = 1j * self.gamma * self.W * M * np.exp(
-                -self.D * z)
+            rv = 1j * gamma(z) * self.W * M / phase
+
+            # Absorption commutes with the linear operator in frequency
+            # domain, but not in time domain
+            if self.frequency_absorption is not None:
+                rv -= self.frequency_absorption * AW
+            if self.time_absorption is not None:
+                X[:] = self.time_absorption * At
+                rv -= plan_inverse() / phase
 
             return rv
 
+        # Weights of the photon number in the interaction picture, which
+        # is the energy if self-steepening is neglected (constant W)
+        weights = np.zeros(self.N)
+        np.divide(1, self.W, out=weights, where=self.W > 0)
+
+        def photon_number(AW):
+            return np.sum(weights * np.abs(AW)**2)
+
+        def absorbed_power(z, AW):
+            """Power absorbed by the boundaries [pJ/m]."""
+            x = AW * np.exp(self._linear_phase(z)) / self.scale
+            power = 0
+            if self.frequency_absorption is not None:
+                power += 2 * self.N * dt * np.sum(
+                    self.frequency_absorption * np.abs(x)**2)
+            if self.time_absorption is not None:
+                power += 2 * dt * np.sum(
+                    self.time_absorption * np.abs(np.fft.fft(x))**2)
+            return power
+
+        absorbing = self.time_absorption is not None \
+            or self.frequency_absorption is not None
+
+        y0 = np.fft.ifft(A) * self.scale
+        method = METHODS.get(self.method, self.method)
+        options = {}
+        if self.first_step is not None:
+            options['first_step'] = min(self.first_step, self.fiber_length)
+        if isinstance(method, type) and \
+                issubclass(method, ConservedQuantityRK4):
+            options['weights'] = weights
+        solver = method(rhs, 0, y0, self.fiber_length, rtol=self.rtol,
+                        atol=self.atol, **options)
+
+        Z = np.linspace(0, self.fiber_length, self.z_saves)
+        i = 0
+        steps = 0
+        nfev = 0
+        offset = 0.
+        status = None
+        message = None
+        first_step = None
+        step_sizes = []
+        absorbed = 0.
+        if absorbing:
+            power = absorbed_power(0, y0)
+
+        def record_node(interpolant=None):
+            f = getattr(solver, 'f', None)
+            if f is None:
+                f = rhs(solver.t, solver.y)
+            middle = None
+            if interpolant is not None:
+                middle = interpolant((solver.t_old + solver.t) / 2)
+            nodes.append((solver.t, solver.y.copy(), np.copy(f), middle))
+
+        if nodes is not None:
+            record_node()
+        try:
+            while status is None:
+                if self.error_norm is not None:
+                    solver.rtol, solver.atol = self.error_norm.tolerances(
+                        solver.y, self.rtol, self.atol)
+                message = solver.step()
+                steps += 1
+                if solver.status == 'finished':
+                    status = 0
+                    message = 'The solver successfully reached the end ' \
+                              'of the integration interval.'
+                elif solver.status == 'failed':
+                    status = -1
+                    break
+                if first_step is None:
+                    first_step = solver.t - solver.t_old
+                if status is None:
+                    # The last step is cut short at the end of the fiber
+                    step_sizes.append(solver.t - solver.t_old)
+
+                interpolant = None
+                if absorbing:
+                    # Simpson's rule over the step
+                    interpolant = solver.dense_output()
+                    z_mid = (solver.t_old + solver.t) / 2
+                    power_mid = absorbed_power(z_mid, interpolant(z_mid))
+                    power_new = absorbed_power(solver.t, solver.y)
+                    absorbed += (solver.t - solver.t_old) / 6 * (
+                        power + 4 * power_mid + power_new)
+                    power = power_new
+
+                # Slices at distances up to and including the current one
+                i_new = np.searchsorted(Z, solver.t, side='right')
+                if i_new > i:
+                    if interpolant is None:
+                        interpolant = solver.dense_output()
+                    for z in Z[i:i_new]:
+                        yield z, interpolant(z), offset
+                    i = i_new
+
+                if nodes is not None:
+                    if interpolant is None:
+                        interpolant = solver.dense_output()
+                    record_node(interpolant)
+
+                if self.moving_frame is not None and status is None:
+                    shift = self._centroid(solver.t, solver.y)
+                    if np.abs(shift) > self.moving_frame * self.N * dt:
+                        # Re-center the window by a linear spectral phase,
+                        # which commutes with the linear operator, and
+                        # restart the solver from the shifted state
+                        y = solver.y * np.exp(-1j * V * shift)
+                        offset += shift
+                        nfev += solver.nfev
+                        options['first_step'] = solver.step_size
+                        solver = method(rhs, solver.t, y, self.fiber_length,
+                                        rtol=self.rtol, atol=self.atol,
+                                        **options)
+                        if absorbing:
+                            power = absorbed_power(solver.t, y)
+        finally:
+            progress_bar.close()
+
+        photon_number_0 = photon_number(y0)
+        drift = float(photon_number(solver.y) / photon_number_0 - 1) \
+            if photon_number_0 > 0 else 0.
+        if first_step is not None:
+            first_step = float(first_step)
+        return {'nfev': nfev + solver.nfev, 'steps': steps, 'drift': drift,
+                'absorbed': float(absorbed), 'first_step': first_step,
+                'median_step': float(np.median(step_sizes))
+                if step_sizes else first_step,
+                'status': status, 'message': message}
+
+    def iter_run(self, with_offset=False):
+        """
+        Solve one mode GNLSE equation described by the given
+        ``GNLSESetup`` object, yielding saved slices as soon as the
+        integrator passes them.
+
+        Parameters
+        ----------
+        with_offset : bool, optional
+            Whether to yield the delay of the window of every slice as
+            well.
+
+        Yields
+        ------
+        z : float
+            Distance of the slice [m].
+        At : ndarray, (n,)
+            Slice in the time domain.
+        AW : ndarray, (n,)
+            Slice in the frequency domain.
+        offset : float
+            Delay of the center of the time window of the slice [ps],
+            nonzero only in a moving frame. Yielded if ``with_offset`` is
+            set.
+
+        Returns
+        -------
+        stats : dict
+            Statistics of the ODE solver, returned when the generator is
+            exhausted.
+        """
+        slices = self._integrate()
+        while True:
+            try:
+                z, AW, offset = next(slices)
+            except StopIteration as stop:
+                return stop.value
+            At_z = np.empty((1, self.N), dtype=complex)
+            AW_z = np.empty((1, self.N), dtype=complex)
+            self._transform(z, AW, At_z, AW_z, 0)
+            if with_offset:
+                yield z, At_z[0], AW_z[0], offset
+            else:
+                yield z, At_z[0], AW_z[0]
+
+    async def aiter_run(self, with_offset=False):
+        """
+        Asynchronous variant of ``iter_run``. The integration runs in a
+        worker thread of its own, which keeps the FFT buffers of the
+        propagation, and the next slice is computed while the current one
+        is consumed.
+
+        Parameters
+        ----------
+        with_offset : bool, optional
+            Whether to yield the delay of the window of every slice as
+            well.
+
+        Yields
+        ------
+        z : float
+            Distance of the slice [m].
+        At : ndarray, (n,)
+            Slice in the time domain.
+        AW : ndarray, (n,)
+            Slice in the frequency domain.
+        offset : float
+            Delay of the center of the time window of the slice [ps].
+            Yielded if ``with_offset`` is set.
+        """
+        loop = asyncio.get_running_loop()
+        snapshots = self.iter_run(with_offset)
+        done = object()
+        # The generator uses the FFT plans of the thread it started in
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        future = loop.run_in_executor(executor, next, snapshots, done)
+        try:
+            while True:
+                snapshot = await future
+                if snapshot is done:
+                    return
+                future = loop.run_in_executor(executor, next, snapshots,
+                                              done)
+                yield snapshot
+        finally:
+            # The generator cannot be closed while it runs in the executor
+            if not future.done():
+                await asyncio.wait([future])
+            snapshots.close()
+            executor.shutdown(wait=False)
+
+    def run(self, At=None, AW=None, reducers=None, fields=True,
+            dense_output=False):
+        """
+        Solve one mode GNLSE equation described by the given
+        ``GNLSESetup`` object.
+
+        Parameters and the returned solution are those of ``propagate``
+        for the input pulse of the setup.
+        """
+        return self.propagate(self.A, At=At, AW=AW, reducers=reducers,
+                              fields=fields, dense_output=dense_output)
+
+    def propagate(self, pulse, At=None, AW=None, reducers=None, fields=True,
+                  dense_output=False):
+        """
+        Propagate an input pulse through the fiber of the setup.
+
+        The operators of the fiber and the FFT plans are prepared once,
+        when the ``GNLSE`` object is created, and the object is not
+        modified by propagation, so that it can propagate any number of
+        input pulses in turn.
+
+        Saved slices are written directly into the output arrays, which
+        can be supplied by the caller, e.g. as memory-mapped files or
+        arrays in shared memory.
+
+        Parameters
+        ----------
+        pulse : Envelope or ndarray, (resolution,)
+            Input pulse: an envelope model or the field on the time grid.
+        At : ndarray, (z_saves, resolution), optional
+            Complex array for intermediate steps in the time domain.
+            A new array is allocated if not given.
+        AW : ndarray, (z_saves, resolution), optional
+            Complex array for intermediate steps in the frequency domain.
+            A new array is allocated if not given.
+        reducers : dict, optional
+            Callables evaluated on every saved slice by name, see
+            ``gnlse.reducers``. Their results are stored in
+            ``Solution.traces``.
+        fields : bool, optional
+            Whether to store the saved slices. If ``False``, only traces
+            of the reducers are kept, so that many slices can be saved
+            in little memory.
+        dense_output : bool, optional
+            Whether to keep the ends of all accepted steps in
+            ``Solution.dense``, from which the field is reconstructed at
+            any distance by ``Solution.field``. Not supported in a moving
+            frame.
+
+        Returns
+        -------
+        setup : Solution
+            Simulation results in the form of a ``Solution`` object.
+        """
+        A = np.asarray(self._input(pulse), dtype=complex)
+        if A.shape != (self.N,):
+            raise ValueError("input pulse must have shape (%d,)" % self.N)
+        if dense_output and self.moving_frame is not None:
+            raise ValueError("dense output is not supported in moving "
+                             "frames")
+        nodes = [] if dense_output else None
+
+        shape = (self.z_saves, self.N)
+        if not fields:
+            if At is not None or AW is not None:
+                raise ValueError("output arrays are not used without "
+                                 "'fields'")
+            # A single row reused for every slice
+            shape = (1, self.N)
+        if At is None:
+            At = np.empty(shape, dtype=complex)
+        if AW is None:
+            AW = np.empty(shape, dtype=complex)
+        if At.shape != shape or AW.shape != shape:
+            raise ValueError("output arrays must have shape %s" % (shape,))
+
         Z = np.linspace(0, self.fiber_length, self.z_saves)
-        solution = scipy.integrate.solve_ivp(
-            rhs,
-            t_span=(0, self.fiber_length),
-            y0=np.fft.ifft(self.A) * self.scale,
-            t_eval=Z,
-            rtol=self.rtol,
-            atol=self.atol,
-            method=self.method)
-        AW = solution.y.T
-
-        progress_bar.close()
-
-        # Transform the results into the time domain
-        At = np.zeros(AW.shape, dtype=AW.dtype)
-        for i in range(len(AW[:, 0])):
-            AW[i, :] *= np.exp(np.transpose(
-                self.D) * Z[i]) / self.scale
-            At[i, :] = np.fft.fft(AW[i, :])
-            AW[i, :] = np.fft.fftshift(AW[i, :]) * self.N * dt
-
-        return Solution(self.t, self.Omega, self.w_0, Z, At, AW)
+        offset = np.zeros(self.z_saves)
+        traces = None if reducers is None else {name: []
+                                                for name in reducers}
+        i = 0
+        slices = self._integrate(A, nodes)
+        while True:
+            try:
+                z, AW_z, offset_z = next(slices)
+            except StopIteration as stop:
+                stats = stop.value
+                break
+            row = i if fields else 0
+            self._transform(z, AW_z, At, AW, row)
+            offset[i] = offset_z
+            if reducers is not None:
+                t = self.t + offset_z
+                for name, reducer in reducers.items():
+                    traces[name].append(
+                        reducer(t, self.Omega, At[row], AW[row]))
+            i += 1
+
+        if i < self.z_saves:
+            # Integration failed, return the slices computed so far
+            Z, offset = Z[:i], offset[:i]
+            if fields:
+                At, AW = At[:i], AW[:i]
+
+        if not fields:
+            At = AW = None
+        if traces is not None:
+            traces = {name: np.array(trace)
+                      for name, trace in traces.items()}
+        if self.moving_frame is None:
+            offset = None
+        dense = None
+        if dense_output:
+            z, y, f, m = zip(*nodes)
+            phase = self.dispersion_table
+            if phase is None:
+                phase = OperatorTable([0.], self._D[np.newaxis])
+            dense = FieldInterpolant(z, y, f, m[1:], phase, self.scale,
+                                     self.t[1] - self.t[0])
+        return Solution(self.t, self.Omega, self.w_0, Z, At, AW, stats=stats,
+                        offset=offset, traces=traces, dense=dense)
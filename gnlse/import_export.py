@@ -1,11 +1,23 @@
-"""Import and export \\*.mat files.
+"""Import and export \\*.mat, HDF5, npz and zarr files.
 
 This module contains functions that enable to read matlab files (\\*.mat)
-in python as dictionary, and to export dictionary to \\*.mat.
+in python as dictionary, and to export dictionary to \\*.mat. Large
+results can be stored instead in chunked and compressed HDF5 (\\*.h5)
+files, zarr directory stores (\\*.zarr) or numpy archives (\\*.npz).
+``read_file`` and ``write_file`` select the format by file extension.
 
 """
 
+import os
+import struct
+import zipfile
+
+import h5py
 import hdf5storage as hdf
+import numpy as np
+
+# Target size of a single chunk of a stored array [bytes]
+CHUNK_SIZE = 2**20
 
 
 def read_mat(filename):
@@ -44,3 +56,306 @@ def write_mat(dictionary, filename):
                 appendmat=True,
                 store_python_metadata=True,
                 action_for_matlab_incompatible='ignore')
+
+
+def _chunks(array):
+    """Chunk shape grouping whole rows of an array, about ``CHUNK_SIZE``
+    bytes each, so that single slices along the first axis are cheap to
+    read back."""
+    if array.ndim == 0:
+        return None
+    row = array[0].nbytes if array.shape[0] else array.itemsize
+    rows = max(1, min(array.shape[0], CHUNK_SIZE // max(row, 1)))
+    return (rows,) + array.shape[1:]
+
+
+def _split(dictionary):
+    """Separates arrays from scalar values, skipping ``None``."""
+    arrays = {}
+    scalars = {}
+    for key, value in dictionary.items():
+        if value is None:
+            continue
+        if np.ndim(value) == 0:
+            scalars[key] = np.asarray(value).item()
+        else:
+            arrays[key] = np.asarray(value)
+    return arrays, scalars
+
+
+def read_h5(filename):
+    """Imports HDF5 file as dictionary.
+
+    Parameters
+    ----------
+    filename : string
+        Name of HDF5 file ('example.h5').
+
+    Returns
+    -------
+    data : dict
+        dictionary of variables in imported file
+    """
+    with h5py.File(filename, 'r') as f:
+        data = {key: f[key][()] for key in f.keys()}
+        data.update(f.attrs)
+    return data
+
+
+def write_h5(dictionary, filename, compression='gzip', compression_opts=4):
+    """Exports dictionary to HDF5 file with chunked and compressed arrays.
+
+    Parameters
+    ----------
+    dictionary : dict
+        A list of variables.
+    filename : string
+        Name of HDF5 file ('example.h5').
+    compression : str, optional
+        HDF5 compression filter, e.g. ``'gzip'``, ``'lzf'`` or ``None``.
+    compression_opts : int, optional
+        Compression level of the ``'gzip'`` filter.
+    """
+    if compression != 'gzip':
+        compression_opts = None
+
+    arrays, scalars = _split(dictionary)
+    with h5py.File(filename, 'w') as f:
+        for key, value in arrays.items():
+            f.create_dataset(key, data=value, chunks=_chunks(value),
+                             compression=compression,
+                             compression_opts=compression_opts,
+                             shuffle=compression is not None)
+        f.attrs.update(scalars)
+
+
+def read_npz(filename):
+    """Imports \\*.npz file as dictionary.
+
+    Parameters
+    ----------
+    filename : string
+        Name of \\*.npz file ('example.npz').
+
+    Returns
+    -------
+    data : dict
+        dictionary of variables in imported file
+    """
+    with np.load(filename) as f:
+        data = {key: f[key] if f[key].ndim else f[key].item()
+                for key in f.files}
+    return data
+
+
+def write_npz(dictionary, filename, compressed=True):
+    """Exports dictionary to \\*.npz file.
+
+    Parameters
+    ----------
+    dictionary : dict
+        A list of variables.
+    filename : string
+        Name of \\*.npz file ('example.npz').
+    compressed : bool, optional
+        Whether to compress the archive. Enabled by default.
+    """
+    arrays, scalars = _split(dictionary)
+    save = np.savez_compressed if compressed else np.savez
+    save(filename, **arrays, **scalars)
+
+
+def read_zarr(filename):
+    """Imports zarr directory store as dictionary.
+
+    Parameters
+    ----------
+    filename : string
+        Name of zarr store ('example.zarr').
+
+    Returns
+    -------
+    data : dict
+        dictionary of variables in imported store
+    """
+    import zarr
+
+    group = zarr.open_group(filename, mode='r')
+    data = {key: array[...] for key, array in group.arrays()}
+    data.update(group.attrs)
+    return data
+
+
+def write_zarr(dictionary, filename):
+    """Exports dictionary to zarr directory store with chunked and
+    compressed arrays. Requires the optional ``zarr`` package.
+
+    Parameters
+    ----------
+    dictionary : dict
+        A list of variables.
+    filename : string
+        Name of zarr store ('example.zarr').
+    """
+    import zarr
+
+    arrays, scalars = _split(dictionary)
+    group = zarr.open_group(filename, mode='w')
+    # zarr>=3 renamed create_dataset to create_array
+    create = getattr(group, 'create_array', None) or group.create_dataset
+    for key, value in arrays.items():
+        create(key, data=value, chunks=_chunks(value))
+    group.attrs.update(scalars)
+
+
+READERS = {
+    '.mat': read_mat,
+    '.h5': read_h5,
+    '.hdf5': read_h5,
+    '.npz': read_npz,
+    '.zarr': read_zarr,
+}
+
+WRITERS = {
+    '.mat': write_mat,
+    '.h5': write_h5,
+    '.hdf5': write_h5,
+    '.npz': write_npz,
+    '.zarr': write_zarr,
+}
+
+
+def file_format(filename):
+    """Returns the extension which determines format of a file.
+
+    Files with no or unknown extension are treated as \\*.mat files.
+    """
+    extension = os.path.splitext(filename.rstrip('/\\'))[1].lower()
+    if extension not in READERS:
+        return '.mat'
+    return extension
+
+
+def read_file(filename):
+    """Imports file as dictionary, choosing the format by extension.
+
+    Parameters
+    ----------
+    filename : string
+        Name of \\*.mat, \\*.h5, \\*.hdf5, \\*.npz or \\*.zarr file.
+
+    Returns
+    -------
+    data : dict
+        dictionary of variables in imported file
+    """
+    return READERS[file_format(filename)](filename)
+
+
+def write_file(dictionary, filename, **kwargs):
+    """Exports dictionary to file, choosing the format by extension.
+
+    Parameters
+    ----------
+    dictionary : dict
+        A list of variables.
+    filename : string
+        Name of \\*.mat, \\*.h5, \\*.hdf5, \\*.npz or \\*.zarr file.
+    **kwargs
+        Format specific options passed to the writer.
+    """
+    WRITERS[file_format(filename)](dictionary, filename, **kwargs)
+
+
+def _npz_arrays(filename):
+    """Memory-maps arrays stored without compression in \\*.npz file and
+    loads the remaining ones."""
+    arrays = {}
+    with zipfile.ZipFile(filename) as archive, open(filename, 'rb') as f:
+        for info in archive.infolist():
+            key = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[key] = np.lib.format.read_array(member)
+                continue
+
+            # Skip the local file header preceding the member data
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', f.read(30)[26:])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(f)
+            else:
+                header = np.lib.format.read_array_header_2_0(f)
+            shape, fortran_order, dtype = header
+
+            if not shape or dtype.hasobject:
+                with archive.open(info) as member:
+                    arrays[key] = np.lib.format.read_array(member)
+            else:
+                arrays[key] = np.memmap(filename, dtype=dtype, mode='r',
+                                        offset=f.tell(), shape=shape,
+                                        order='F' if fortran_order else 'C')
+    return arrays
+
+
+class LazyFile(object):
+    """Variables stored in a file, read on demand.
+
+    Arrays are returned as array-like objects that read only the requested
+    part of the data when sliced: datasets of HDF5 files, arrays of zarr
+    stores and memory-mapped arrays of uncompressed \\*.npz files.
+    Compressed \\*.npz members and \\*.mat files are loaded completely.
+
+    Parameters
+    ----------
+    filename : string
+        Name of \\*.mat, \\*.h5, \\*.hdf5, \\*.npz or \\*.zarr file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.handle = None
+
+        extension = file_format(filename)
+        if extension in ('.h5', '.hdf5'):
+            self.handle = h5py.File(filename, 'r')
+            self.data = dict(self.handle.items())
+            self.data.update(self.handle.attrs)
+        elif extension == '.zarr':
+            import zarr
+
+            group = zarr.open_group(filename, mode='r')
+            self.data = dict(group.arrays())
+            self.data.update(group.attrs)
+        elif extension == '.npz':
+            self.data = {key: value if value.ndim else value.item()
+                         for key, value in _npz_arrays(filename).items()}
+        else:
+            self.data = read_mat(filename)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def keys(self):
+        return self.data.keys()
+
+    def close(self):
+        """Closes the underlying file."""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+        self.data = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,245 @@
+"""ODE solvers and error norms with step size control specific to the GNLSE.
+
+Solvers in this module are subclasses of ``scipy.integrate.OdeSolver``, so
+they can be used as the integration ``method`` of ``GNLSESetup`` in place
+of the generic methods of ``scipy.integrate.solve_ivp``. Error norms adapt
+the absolute tolerance of the generic methods to the current spectrum.
+
+"""
+
+import numpy as np
+from scipy.integrate import DenseOutput, OdeSolver
+from scipy.ndimage import maximum_filter1d
+
+
+class SpectralErrorNorm(object):
+    """Error norm ignoring numerically empty spectral bins.
+
+    Before every step the absolute tolerance of each frequency bin is
+    adapted to the local spectral amplitude, the maximum of ``abs(y)`` over
+    ``width`` neighbouring bins. Bins whose local spectral energy is below
+    ``floor`` times the peak one are excluded from the error estimate, which
+    is the root-mean-square over the remaining bins only. If
+    ``weighted`` is set, the tolerance of the remaining bins is also
+    loosened in proportion to the ratio of the peak and the local amplitude.
+
+    Applies to the ``'RK23'``, ``'RK45'``, ``'DOP853'``, ``'Radau'`` and
+    ``'BDF'`` methods, which read the absolute tolerance at every step.
+
+    Attributes
+    ----------
+    floor : float
+        Dynamic floor of the spectral energy relative to its peak.
+    weighted : bool
+        Whether to weight bins by their local spectral amplitude.
+    width : int
+        Number of bins defining the local spectral amplitude.
+    """
+
+    def __init__(self, floor=1e-12, weighted=False, width=16):
+        self.floor = floor
+        self.weighted = weighted
+        self.width = width
+
+    def atol(self, y, atol):
+        """Absolute tolerance of every bin for state ``y``.
+
+        Parameters
+        ----------
+        y : ndarray, (n,)
+            Spectrum in the interaction picture.
+        atol : float
+            Absolute tolerance set for the simulation.
+
+        Returns
+        -------
+        ndarray, (n,)
+            Absolute tolerances, infinite for bins ignored by the norm.
+        """
+        amplitude = maximum_filter1d(np.abs(y), self.width, mode='wrap')
+        peak = amplitude.max()
+        if peak == 0:
+            return np.full(y.shape, atol, dtype=float)
+
+        empty = amplitude**2 < self.floor * peak**2
+        if self.weighted:
+            tolerance = np.full(y.shape, np.inf)
+            np.divide(atol * peak, amplitude, out=tolerance, where=~empty)
+        else:
+            tolerance = np.full(y.shape, atol, dtype=float)
+        tolerance[empty] = np.inf
+        return tolerance
+
+    def tolerances(self, y, rtol, atol):
+        """Relative and absolute tolerances for state ``y``, normalized so
+        that the root-mean-square error norm of the solver averages over
+        the bins which are not ignored only.
+
+        Parameters
+        ----------
+        y : ndarray, (n,)
+            Spectrum in the interaction picture.
+        rtol : float
+            Relative tolerance set for the simulation.
+        atol : float
+            Absolute tolerance set for the simulation.
+
+        Returns
+        -------
+        rtol : float
+            Relative tolerance.
+        atol : ndarray, (n,)
+            Absolute tolerances, infinite for bins ignored by the norm.
+        """
+        tolerance = self.atol(y, atol)
+        counted = np.count_nonzero(np.isfinite(tolerance))
+        if counted == 0:
+            return rtol, tolerance
+        # Scaling all tolerances by sqrt(m / n) turns the mean over all n
+        # bins into the mean over the m counted ones
+        factor = np.sqrt(counted / len(tolerance))
+        return rtol * factor, tolerance * factor
+
+
+class HermiteDenseOutput(DenseOutput):
+    """Cubic Hermite interpolant of a single step, built from the solution
+    and its derivative at both ends of the step."""
+
+    def __init__(self, t_old, t, y_old, f_old, y, f):
+        super().__init__(t_old, t)
+        self.h = t - t_old
+        self.y_old = y_old
+        self.f_old = f_old
+        self.y = y
+        self.f = f
+
+    def _call_impl(self, t):
+        s = (np.asarray(t) - self.t_old) / self.h
+        if s.ndim > 0:
+            s = s[np.newaxis, :]
+            y_old, f_old = self.y_old[:, None], self.f_old[:, None]
+            y, f = self.y[:, None], self.f[:, None]
+        else:
+            y_old, f_old, y, f = self.y_old, self.f_old, self.y, self.f
+
+        return ((2 * s**3 - 3 * s**2 + 1) * y_old
+                + (s**3 - 2 * s**2 + s) * self.h * f_old
+                + (-2 * s**3 + 3 * s**2) * y
+                + (s**3 - s**2) * self.h * f)
+
+
+class ConservedQuantityRK4(OdeSolver):
+    """Classical fourth-order Runge-Kutta method with the step size
+    controlled by the relative change of a conserved quantity, the
+    conservation quantity error method of [H09]_.
+
+    The conserved quantity is ``sum(weights * abs(y)**2)``: the photon
+    number in the interaction picture if the weights are inverse absolute
+    frequencies, or the energy if they are constant. A step is rejected and
+    halved if its relative change exceeds twice the local goal ``rtol``.
+    Otherwise the next step is shortened by a factor of 2^(1/5) if the
+    change exceeds the goal, or lengthened by the same factor if it is
+    below half of the goal.
+
+    Parameters
+    ----------
+    fun : callable
+        Right hand side of the system.
+    t0 : float
+        Initial time.
+    y0 : ndarray, (n,)
+        Initial state.
+    t_bound : float
+        Boundary time of integration.
+    weights : ndarray, (n,), optional
+        Weights of the conserved quantity. Constant by default.
+    rtol : float, optional
+        Local goal of the relative change of the conserved quantity.
+    first_step : float, optional
+        Initial step size. One thousandth of the interval by default.
+    max_step : float, optional
+        Maximum allowed step size.
+    """
+
+    def __init__(self, fun, t0, y0, t_bound, weights=None, rtol=1e-6,
+                 first_step=None, max_step=np.inf, vectorized=False,
+                 **extraneous):
+        super().__init__(fun, t0, y0, t_bound, vectorized,
+                         support_complex=True)
+        if weights is None:
+            weights = np.ones(self.n)
+        self.weights = weights
+        self.rtol = rtol
+        self.max_step = max_step
+        if first_step is None:
+            first_step = np.abs(t_bound - t0) / 1000
+        self.h = first_step
+        self.h_previous = None
+        self.y_old = None
+        self.f_old = None
+        self.rejected = 0
+
+        self.f = self.fun(self.t, self.y)
+        self.q = self.conserved_quantity(self.y)
+
+    def conserved_quantity(self, y):
+        """Value of the conserved quantity for state ``y``."""
+        return np.sum(self.weights * np.abs(y)**2)
+
+    def _rk4(self, t, y, h):
+        k1 = self.f
+        k2 = self.fun(t + h / 2, y + h / 2 * k1)
+        k3 = self.fun(t + h / 2, y + h / 2 * k2)
+        k4 = self.fun(t + h, y + h * k3)
+        return y + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+    def _step_impl(self):
+        t = self.t
+        y = self.y
+        min_step = 10 * np.abs(np.nextafter(t, self.direction * np.inf) - t)
+
+        h = min(self.h, self.max_step)
+        while True:
+            if h < min_step:
+                return False, self.TOO_SMALL_STEP
+
+            # Do not step over the boundary
+            t_new = t + self.direction * h
+            if self.direction * (t_new - self.t_bound) > 0:
+                t_new = self.t_bound
+            h_step = np.abs(t_new - t)
+
+            y_new = self._rk4(t, y, self.direction * h_step)
+            q_new = self.conserved_quantity(y_new)
+            if self.q > 0:
+                delta = np.abs(q_new - self.q) / self.q
+            else:
+                delta = 0
+
+            if delta > 2 * self.rtol:
+                self.rejected += 1
+                h = h_step / 2
+                continue
+            break
+
+        if delta > self.rtol:
+            h = h_step / 2**0.2
+        elif delta < self.rtol / 2:
+            h = h_step * 2**0.2
+        else:
+            h = h_step
+
+        self.h_previous = h_step
+        self.h = h
+        self.t_old = t
+        self.y_old = y
+        self.f_old = self.f
+        self.t = t_new
+        self.y = y_new
+        self.f = self.fun(t_new, y_new)
+        self.q = q_new
+        return True, None
+
+    def _dense_output_impl(self):
+        return HermiteDenseOutput(self.t_old, self.t, self.y_old, self.f_old,
+                                  self.y, self.f)
@@ -0,0 +1,327 @@
+"""Optional JAX backend of the GNLSE propagator.
+
+The whole propagation - linear phase of the interaction picture, Kerr and
+Raman terms and self-steepening - is traced and compiled by ``jax.jit``
+into a single CPU program, which removes the Python overhead of every
+evaluation of the right hand side and fuses the elementwise operations.
+The equation is integrated in the interaction picture with the adaptive
+Dormand-Prince 5(4) method, with the step size control of the ``'RK45'``
+method of ``scipy.integrate.solve_ivp`` and the tolerances of the setup.
+Alternatively, the classical fourth-order Runge-Kutta method with a fixed
+step can be used, which requires a step small enough for the whole
+propagation but, unlike the adaptive method, supports reverse-mode
+differentiation with ``jax.grad`` for optimization. Since the propagator
+is a pure JAX function, batches of input pulses, nonlinear coefficients or
+dispersion operators are propagated at once with ``jax.vmap``.
+
+The backend requires the ``jax`` package, which is not a dependency of
+gnlse. It enables double precision in JAX when first used.
+
+Example
+-------
+Propagating pulses of three peak powers at once::
+
+    solver = JaxGNLSE(setup)
+    pulses = [SechEnvelope(power, 0.05).A(solver.t)
+              for power in (1000, 2000, 4000)]
+    solutions = solver.run_batch(A=pulses)
+
+"""
+
+import warnings
+
+import numpy as np
+
+from gnlse.gnlse import GNLSE, Solution
+
+# Butcher tableau of the Dormand-Prince 5(4) method and the weights of its
+# error estimate, including the derivative at the end of the step
+_C = (0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1)
+_A = ((),
+      (1 / 5,),
+      (3 / 40, 9 / 40),
+      (44 / 45, -56 / 15, 32 / 9),
+      (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+      (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656))
+_B = (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84)
+_E = (-71 / 57600, 0, 71 / 16695, -71 / 1920, 17253 / 339200, -22 / 525,
+      1 / 40)
+
+
+def _import_jax():
+    import jax
+
+    jax.config.update('jax_enable_x64', True)
+    return jax
+
+
+class JaxGNLSE(object):
+    """
+    Model propagation of an optical pulse in a fiber with the JAX backend.
+
+    Attributes
+    ----------
+    steps_per_save : int or None
+        Number of fixed Runge-Kutta steps between saved slices, or ``None``
+        for the adaptive method.
+    propagate : callable
+        Compiled propagator ``propagate(A, nonlinearity, dispersion)``
+        returning the slices ``At`` and ``AW``, the number of evaluations
+        of the right hand side, the number of steps and whether every
+        slice was reached before the step size of the adaptive method fell
+        below its minimum. It can be transformed further with ``jax.vmap``
+        or ``jax.grad``.
+    """
+
+    def __init__(self, setup, steps_per_save=None):
+        """
+        Parameters
+        ----------
+        setup : GNLSESetup
+            Model inputs in the form of a ``GNLSESetup`` object. Its
+            ``method`` and ``error_norm`` are not used.
+        steps_per_save : int, optional
+            Number of fixed Runge-Kutta steps between saved slices. The
+            adaptive method is used by default.
+        """
+
+        if setup.z_saves < 2:
+            raise ValueError("'z_saves' has to be at least 2")
+        if steps_per_save is not None and steps_per_save < 1:
+            raise ValueError("'steps_per_save' has to be positive")
+
+        solver = GNLSE(setup)
+        if solver.dispersion_table is not None \
+                or solver.gamma_table is not None:
+            raise ValueError(
+                "longitudinally varying fibers are not supported")
+        if solver.time_absorption is not None \
+                or solver.frequency_absorption is not None:
+            raise ValueError("absorbing boundaries are not supported")
+        if solver.moving_frame is not None:
+            raise ValueError("moving frames are not supported")
+
+        self.jax = _import_jax()
+        self.steps_per_save = steps_per_save
+        self.rtol = solver.rtol
+        self.atol = solver.atol
+        self.N = solver.N
+        self.fiber_length = solver.fiber_length
+        self.z_saves = solver.z_saves
+        self.t = solver.t
+        self.V = solver.V
+        self.w_0 = solver.w_0
+        self.Omega = solver.Omega
+        self.W = solver.W
+        self.scale = solver.scale
+        self.RW = solver.RW
+        self.fr = solver.fr if solver.RW is not None else 0
+        self.A = solver.A
+        self.D = solver.D
+        self.nonlinearity = solver.gamma * solver.w_0
+
+        self.propagate = self.jax.jit(self._propagate)
+
+    def _propagate(self, A, nonlinearity, D):
+        jnp = self.jax.numpy
+
+        N = self.N
+        dt = self.t[1] - self.t[0]
+        W = self.W
+        RW = self.RW
+        fr = self.fr
+        gamma = nonlinearity / self.w_0
+        D = jnp.fft.fftshift(D)
+
+        def rhs(z, AW):
+            """
+            The right hand side of the differential equation to integrate.
+            """
+
+            phase = jnp.exp(D * z)
+            At = jnp.fft.fft(AW * phase)
+            IT = jnp.abs(At)**2
+
+            if RW is not None:
+                RS = dt * fr * jnp.fft.fft(jnp.fft.ifft(IT) * RW)
+                M = jnp.fft.ifft(At * ((1 - fr) * IT + RS))
+            else:
+                M = jnp.fft.ifft(At * IT)
+
+            return 1j * gamma * W * M / phase
+
+        Z = jnp.linspace(0, self.fiber_length, self.z_saves)
+        y0 = jnp.fft.ifft(A) * self.scale
+        if self.steps_per_save is None:
+            ys, nfev, steps, reached = self._dopri5(rhs, y0, Z)
+        else:
+            ys, nfev, steps, reached = self._rk4(rhs, y0, Z)
+        ys = jnp.concatenate((y0[jnp.newaxis], ys))
+        reached = jnp.concatenate((jnp.ones(1, dtype=bool), reached))
+
+        AW = ys * jnp.exp(D * Z[:, jnp.newaxis]) / self.scale
+        At = jnp.fft.fft(AW, axis=-1)
+        AW = jnp.fft.fftshift(AW, axes=-1) * N * dt
+        return At, AW, nfev, steps, reached
+
+    def _rk4(self, rhs, y0, Z):
+        """
+        Integrates with the classical Runge-Kutta method with a fixed
+        step, yielding slices at ``Z[1:]``.
+        """
+        jnp = self.jax.numpy
+        h = self.fiber_length / ((self.z_saves - 1) * self.steps_per_save)
+
+        def step(carry, i):
+            z0, y = carry
+            z = z0 + i * h
+            k1 = rhs(z, y)
+            k2 = rhs(z + h / 2, y + h / 2 * k1)
+            k3 = rhs(z + h / 2, y + h / 2 * k2)
+            k4 = rhs(z + h, y + h * k3)
+            return (z0, y + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)), None
+
+        def save(y, z0):
+            (_, y), _ = self.jax.lax.scan(step, (z0, y),
+                                          jnp.arange(self.steps_per_save))
+            return y, y
+
+        _, ys = self.jax.lax.scan(save, y0, Z[:-1])
+        steps = (self.z_saves - 1) * self.steps_per_save
+        return ys, 4 * steps, steps, jnp.ones(self.z_saves - 1, dtype=bool)
+
+    def _dopri5(self, rhs, y0, Z):
+        """
+        Integrates with the Dormand-Prince 5(4) method with adaptive step
+        size, as ``'RK45'`` of ``scipy.integrate.solve_ivp``, yielding slices
+        at ``Z[1:]`` and whether they were reached. The integration stops
+        when the step size falls below its minimum.
+        """
+        jnp = self.jax.numpy
+        lax = self.jax.lax
+        rtol = self.rtol
+        atol = self.atol
+        min_step = 1e-12 * self.fiber_length
+
+        def step(state, target):
+            z, y, f, h, nfev, steps = state
+            h = jnp.minimum(h, target - z)
+            k = [f]
+            for c, a in zip(_C[1:], _A[1:]):
+                k.append(rhs(z + c * h, y + h * sum(
+                    a_j * k_j for a_j, k_j in zip(a, k))))
+            y_new = y + h * sum(b * k_j for b, k_j in zip(_B, k))
+            f_new = rhs(z + h, y_new)
+            k.append(f_new)
+            error = h * sum(e * k_j for e, k_j in zip(_E, k))
+            scale = atol + rtol * jnp.maximum(jnp.abs(y), jnp.abs(y_new))
+            norm = jnp.sqrt(jnp.mean(jnp.abs(error / scale)**2))
+
+            accepted = norm < 1
+            factor = jnp.where(
+                norm == 0, 10,
+                0.9 * jnp.maximum(norm, 1e-10)**-0.2)
+            factor = jnp.where(accepted, jnp.minimum(factor, 10),
+                               jnp.clip(factor, 0.2, 1))
+            z_new = jnp.where(h == target - z, target, z + h)
+            return (jnp.where(accepted, z_new, z),
+                    jnp.where(accepted, y_new, y),
+                    jnp.where(accepted, f_new, f),
+                    h * factor, nfev + 6, steps + accepted)
+
+        def save(state, target):
+            state = lax.while_loop(
+                lambda state: (state[0] < target) & (state[3] > min_step),
+                lambda state: step(state, target), state)
+            return state, (state[1], state[0] >= target)
+
+        h0 = self.fiber_length / (self.z_saves - 1) / 100
+        state = (0.0, y0, rhs(0.0, y0), h0, 1, 0)
+        state, (ys, reached) = lax.scan(save, state, Z[1:])
+        return ys, state[4], state[5], reached
+
+    def _arguments(self, A, nonlinearity, dispersion):
+        return (self.A if A is None else A,
+                self.nonlinearity if nonlinearity is None else nonlinearity,
+                self.D if dispersion is None else dispersion)
+
+    def run(self, A=None, nonlinearity=None, dispersion=None):
+        """
+        Solve one mode GNLSE equation with the JAX backend.
+
+        Parameters
+        ----------
+        A : ndarray, (resolution,), optional
+            Input pulse in the time domain. That of the setup by default.
+        nonlinearity : float, optional
+            Nonlinear coefficient [1/W/m]. That of the setup by default.
+        dispersion : ndarray, (resolution,), optional
+            Dispersion operator on the relative angular frequency grid
+            ``V``, e.g. ``DispersionFiberFromTaylor(loss, betas).D(V)``.
+            That of the setup by default.
+
+        Returns
+        -------
+        Solution
+            Simulation results in the form of a ``Solution`` object.
+        """
+        return self._solution(*self.propagate(
+            *self._arguments(A, nonlinearity, dispersion)))
+
+    def run_batch(self, A=None, nonlinearity=None, dispersion=None):
+        """
+        Solve GNLSE for a batch of parameters in a single vectorized
+        program.
+
+        Every given parameter is a batch stacked along the first axis; the
+        batches have to be of equal size. Parameters which are not given
+        are shared by the whole batch.
+
+        Parameters
+        ----------
+        A : ndarray, (k, resolution), optional
+            Input pulses in the time domain.
+        nonlinearity : ndarray, (k,), optional
+            Nonlinear coefficients [1/W/m].
+        dispersion : ndarray, (k, resolution), optional
+            Dispersion operators on the relative angular frequency grid,
+            e.g. ``DispersionFiberFromTaylor.D_batch(V, betas, loss)``.
+
+        Returns
+        -------
+        list of Solution
+            Simulation results for every member of the batch.
+        """
+        given = (A, nonlinearity, dispersion)
+        if all(value is None for value in given):
+            raise ValueError("no batched parameter given")
+        axes = tuple(None if value is None else 0 for value in given)
+        arguments = [value if value is None else np.asarray(value)
+                     for value in given]
+
+        results = [np.asarray(value) for value in self.jax.vmap(
+            self.propagate, in_axes=axes)(*self._arguments(*arguments))]
+        return [self._solution(*(value[k] for value in results))
+                for k in range(len(results[0]))]
+
+    def _solution(self, At, AW, nfev, steps, reached):
+        """Solution of the slices reached by the integration."""
+        reached = np.asarray(reached)
+        Z = np.linspace(0, self.fiber_length, self.z_saves)
+        if np.all(reached):
+            status = 0
+            message = 'The solver successfully reached the end of the ' \
+                      'integration interval.'
+        else:
+            # Slices beyond the last reached one hold the stalled state
+            count = int(np.argmin(reached))
+            status = -1
+            message = 'The step size fell below its minimum.'
+            warnings.warn("integration stopped at z = %g m before the end "
+                          "of the fiber: %s" % (Z[count - 1], message),
+                          RuntimeWarning)
+            Z, At, AW = Z[:count], At[:count], AW[:count]
+        stats = {'nfev': int(nfev), 'steps': int(steps), 'status': status,
+                 'message': message}
+        return Solution(self.t, self.Omega, self.w_0, Z, np.asarray(At),
+                        np.asarray(AW), stats=stats)
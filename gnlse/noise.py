@@ -0,0 +1,118 @@
+"""Quantum noise of input fields.
+
+This module generates the one-photon-per-mode noise of the semiclassical
+model of input pulse noise [DGC06]_ for many realizations at once. Random
+numbers are drawn from ``numpy.random.Generator`` streams spawned from
+a ``numpy.random.SeedSequence``: realization ``k`` of a given seed always
+uses its own stream, so results are reproducible bit for bit regardless of
+how realizations are split between batches, processes or cluster nodes.
+
+Example
+-------
+Two workers sharing 100 realizations between them::
+
+    noise = one_photon_per_mode(t, 835, realizations=50, seed=2023)
+    noise = one_photon_per_mode(t, 835, realizations=50, seed=2023,
+                                first=50)
+
+"""
+
+import numpy as np
+
+from gnlse.common import c, hbar
+
+
+def seed_sequences(seed, realizations, first=0):
+    """Seed sequences of independent random streams of realizations.
+
+    Parameters
+    ----------
+    seed : int or SeedSequence
+        Seed of the whole ensemble.
+    realizations : int
+        Number of realizations.
+    first : int, optional
+        Index of the first realization.
+
+    Returns
+    -------
+    list of SeedSequence
+        Seed sequences of realizations ``first``, ..., ``first +
+        realizations - 1``, identical to children spawned from ``seed``.
+    """
+
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [np.random.SeedSequence(seed.entropy,
+                                   spawn_key=seed.spawn_key + (k,),
+                                   pool_size=seed.pool_size)
+            for k in range(first, first + realizations)]
+
+
+def random_phases(n, realizations=1, seed=None, first=0):
+    """Uniformly distributed random phases.
+
+    Parameters
+    ----------
+    n : int
+        Number of phases per realization.
+    realizations : int, optional
+        Number of realizations.
+    seed : int, SeedSequence or Generator, optional
+        Seed of the ensemble; every realization is drawn from its own
+        stream. A ``Generator`` is instead used for all realizations.
+        Fresh entropy is used if ``None``.
+    first : int, optional
+        Index of the first realization.
+
+    Returns
+    -------
+    ndarray, (realizations, n)
+        Phases [rad].
+    """
+
+    if isinstance(seed, np.random.Generator):
+        return 2 * np.pi * seed.random((realizations, n))
+
+    phases = np.empty((realizations, n))
+    for k, sequence in enumerate(seed_sequences(seed, realizations, first)):
+        phases[k] = 2 * np.pi * np.random.default_rng(sequence).random(n)
+    return phases
+
+
+def one_photon_per_mode(t, wavelength, realizations=1, seed=None, first=0):
+    """One-photon-per-mode noise with random phases in the time domain.
+
+    Parameters
+    ----------
+    t : ndarray, (n,)
+        Time grid [ps], as in ``GNLSE``.
+    wavelength : float
+        Central wavelength [nm].
+    realizations : int, optional
+        Number of realizations.
+    seed : int, SeedSequence or Generator, optional
+        Seed of the ensemble, see ``random_phases``.
+    first : int, optional
+        Index of the first realization.
+
+    Returns
+    -------
+    ndarray, (realizations, n)
+        Noise fields in the time domain [W^(1/2)], to be added to the input
+        pulse envelope.
+    """
+
+    n = len(t)
+    dt = t[1] - t[0]
+    time_window = n * dt
+    # Absolute angular frequency grid in the order of np.fft [1/ps]
+    V = 2 * np.pi * np.arange(-n / 2, n / 2) / time_window
+    W = np.fft.fftshift(V + 2 * np.pi * c / wavelength)
+
+    # One photon of energy hbar * W in every mode of the time window [W]
+    power = np.zeros(n)
+    np.multiply(hbar * 1e24 / time_window, W, out=power, where=W > 0)
+
+    phases = random_phases(n, realizations, seed, first)
+    return np.fft.fft(np.sqrt(power) * np.exp(1j * phases), axis=-1)
@@ -4,6 +4,11 @@ Based on delivered frequency vector and effictive mode areas
 script calculates nonlinear coefficient in
 frequency domain.
 
+Fits of the data are computed once per model and the coefficients are
+kept for the last frequency grid. Batches of fibers or of central
+wavelengths, e.g. for sweeps over the pump wavelength, are evaluated at
+once with ``NonlinearityFromEffectiveArea.gamma_batch``.
+
 """
 import numpy as np
 from scipy import interpolate
@@ -65,36 +70,206 @@ class NonlinearityFromEffectiveArea(Nonlinearity):
         self.n2 = n2
         # maximum (artificial) value of neff
         self.neff_max = neff_max
+        self._spline = None
+        self._spline_data = None
+        self._cache = None
 
-    def gamma(self, V):
-        # Central frequency [1/ps = THz]
-        omega = 2 * np.pi * c / self.lambdas
-        Omega = V + self.w0
-
-        # Extrapolate effective mode area for a frequency vector
-        Aeff_interp = interpolate.interp1d(omega,
-                                           self.Aeff,
-                                           kind='cubic',
-                                           fill_value="extrapolate")
-        # Extrapolate effective mode area for a frequency vector
-        neff_interp = interpolate.interp1d(omega,
-                                           self.neff,
-                                           kind='cubic',
-                                           fill_value="extrapolate")
-
-        # Refractive index
-        neff = neff_interp(Omega)
-        if self.neff_max is not None:
-            neff[Omega < omega[-1]] = self.neff_max
+    @staticmethod
+    def _fit(neff, Aeff, lambdas):
+        """Cubic spline of effective refractive indices and mode areas over
+        angular frequency, extrapolated beyond the data, as
+        ``interp1d(kind='cubic')``."""
+        # Angular frequencies [1/ps = THz]
+        omega = 2 * np.pi * c / np.asarray(lambdas, dtype=float)
+        data = np.stack(np.broadcast_arrays(neff, Aeff))
+        order = np.argsort(omega)
+        return interpolate.make_interp_spline(
+            omega[order], np.take(data, order, axis=-1), k=3, axis=-1)
+
+    @staticmethod
+    def _coefficients(values, values0, Omega, w0, n2, neff_max, omega_max,
+                      Aeff_max):
+        """Nonlinear coefficients and pseudo-envelope scaling from
+        interpolated refractive indices and mode areas."""
+        # Refractive index and efective mode area
+        neff, Aeff = values
         # and at central frequency
-        n0 = neff_interp(self.w0)
-        # Efective mode area
-        Aeff = Aeff_interp(Omega)
-        if self.neff_max is not None:
-            Aeff[Omega < omega[-1]] = max(self.Aeff)
-        # and at central frequency [1/m^2]
-        Aeff0 = Aeff_interp(self.w0)
-
-        gamma = self.n2 * self.w0 \
+        n0, Aeff0 = values0[..., np.newaxis]
+        if neff_max is not None:
+            beyond = Omega < omega_max
+            neff = np.where(beyond, neff_max, neff)
+            Aeff = np.where(beyond, Aeff_max[..., np.newaxis], Aeff)
+
+        gamma = n2 * np.asarray(w0)[..., np.newaxis] \
             * n0 / c / 1e-9 / neff / np.sqrt(Aeff * Aeff0)
         return gamma, np.power(Aeff0 / Aeff, 1. / 4)
+
+    @classmethod
+    def _batch(cls, spline, V, w0, n2, neff_max, lambdas, Aeff):
+        # Value at the last wavelength of the data, beyond which neff_max
+        # is used
+        omega_max = 2 * np.pi * c / np.asarray(lambdas, dtype=float)[-1]
+        Aeff_max = np.max(Aeff, axis=-1)
+        Omega = V + np.asarray(w0)[..., np.newaxis]
+        return cls._coefficients(spline(Omega), spline(w0), Omega, w0, n2,
+                                 neff_max, omega_max, Aeff_max)
+
+    def _fitted(self):
+        # The spline is fitted once and refitted only if the data change
+        data = (self.neff, self.Aeff, self.lambdas)
+        if self._spline is None or any(
+                a is not b for a, b in zip(data, self._spline_data)):
+            self._spline = self._fit(*data)
+            self._spline_data = data
+            self._cache = None
+        return self._spline
+
+    def gamma(self, V):
+        spline = self._fitted()
+        # Results are kept for the last frequency grid and parameters
+        key = (self.w0, self.n2, self.neff_max)
+        if self._cache is None or self._cache[0] != key \
+                or not np.array_equal(self._cache[1], V):
+            gamma, scale = self._batch(spline, V, self.w0, self.n2,
+                                       self.neff_max, self.lambdas,
+                                       np.asarray(self.Aeff, dtype=float))
+            self._cache = (key, np.array(V), gamma, scale)
+        return self._cache[2].copy(), self._cache[3].copy()
+
+    def gamma0(self):
+        """Nonlinear coefficient at the central frequency [1/W/m], e.g.
+        for comparison with a scalar nonlinearity."""
+        Aeff0 = self._fitted()(self.w0)[1]
+        return self.n2 * self.w0 / c / 1e-9 / Aeff0
+
+    @classmethod
+    def gamma_batch(cls, V, neff, Aeff, lambdas, central_wavelength,
+                    n2=2.7e-20, neff_max=None):
+        """Calculate nonlinear coefficients for a batch of fibers, given at
+        common wavelengths, or of central wavelengths. The data are fitted
+        only once for the whole batch.
+
+        Parameters
+        ----------
+        V : ndarray, (N)
+            Frequency vector
+        neff : ndarray, (L) or (K, L)
+            Effective refractive indices of one or every fiber
+        Aeff : ndarray, (L) or (K, L)
+            Effective mode areas of one or every fiber [m^2]
+        lambdas : ndarray, (L)
+            Wavelengths corresponding to refractive indices [nm]
+        central_wavelength : float or ndarray, (K)
+            Wavelength corresponding to pump wavelength of all or every
+            member of the batch [nm]
+        n2 : float
+            Nonlinear index of refraction [m^2/W]
+        neff_max : float
+            Maximum (artificial) value of neff
+
+        Returns
+        -------
+        gamma : ndarray, (K, N)
+            Nonlinear coefficients in frequency domain
+        scale : ndarray, (K, N)
+            Pseudo-envelope scaling
+        """
+
+        neff = np.asarray(neff, dtype=float)
+        Aeff = np.asarray(Aeff, dtype=float)
+        w0 = (2.0 * np.pi * c) / np.asarray(central_wavelength, dtype=float)
+        fibers = max(neff.ndim, Aeff.ndim) > 1
+        if not fibers or w0.ndim == 0:
+            spline = cls._fit(neff, Aeff, lambdas)
+            gamma, scale = cls._batch(spline, V, w0, n2, neff_max, lambdas,
+                                      Aeff)
+            return np.atleast_2d(gamma), np.atleast_2d(scale)
+
+        # Fibers with their own central wavelengths
+        neff, Aeff, w0 = np.broadcast_arrays(neff, Aeff, w0[:, np.newaxis])
+        rows = [cls._batch(cls._fit(neff[i], Aeff[i], lambdas), V, w0[i, 0],
+                           n2, neff_max, lambdas, Aeff[i])
+                for i in range(len(w0))]
+        gamma, scale = zip(*rows)
+        return np.array(gamma), np.array(scale)
+
+
+class NonlinearityAlongZ(Nonlinearity):
+    """Nonlinear coefficient of a longitudinally varying fiber, e.g. a taper.
+
+    Local nonlinearities are given at a set of positions along the fiber
+    either as scalar values [1/W/m] or as ``Nonlinearity`` models. They are
+    evaluated only once for the simulation frequency grid and interpolated
+    linearly between the positions during integration.
+
+    The pseudo-envelope scaling of frequency dependent models [J07]_ is
+    taken from the model at the fiber input. Scalars and frequency
+    dependent models cannot be mixed.
+
+    Attributes
+    ----------
+    z : ndarray (K)
+        Increasing positions along the fiber [m]
+    models : list of float or list of Nonlinearity (K)
+        Local nonlinearities at the positions ``z``. Beyond the first
+        and the last position the fiber is assumed to be uniform.
+    """
+
+    def __init__(self, z, models):
+        self.z = np.asarray(z, dtype=float)
+        self.models = list(models)
+
+        if self.z.ndim != 1 or len(self.z) != len(self.models):
+            raise ValueError("'z' and 'models' must have the same length")
+        if len(self.z) == 0:
+            raise ValueError("at least one nonlinearity model is required")
+        if np.any(np.diff(self.z) <= 0):
+            raise ValueError("'z' must be strictly increasing")
+        if len({hasattr(model, 'gamma') for model in self.models}) > 1:
+            # The scaling of a scalar section would not match the others
+            raise ValueError("'models' must be either all scalars or all "
+                             "frequency dependent models")
+
+    def gamma(self, V):
+        """Nonlinear coefficient and scaling at the fiber input."""
+        gamma, scale = self.gamma_table(V)
+        return gamma[0] * np.ones(V.shape), scale
+
+    def gamma_table(self, V):
+        """Calculate nonlinear coefficients at all positions ``z``.
+
+        Parameters
+        ----------
+        V : ndarray, (N)
+            Frequency vector
+
+        Returns
+        -------
+        gamma : ndarray, (K,) or (K, N)
+            Nonlinear coefficients, one row per position. Scalar models
+            give a one dimensional table.
+        scale : ndarray, (N) or float
+            Pseudo-envelope scaling at the fiber input.
+        """
+
+        if not any(hasattr(model, 'gamma') for model in self.models):
+            return np.array(self.models, dtype=float), 1
+
+        models = self.models
+        first = models[0]
+        if all(type(model) is NonlinearityFromEffectiveArea
+               and np.shape(model.neff) == np.shape(first.neff)
+               and np.array_equal(model.lambdas, first.lambdas)
+               and (model.w0, model.n2, model.neff_max)
+               == (first.w0, first.n2, first.neff_max) for model in models):
+            # Fibers sharing wavelengths and parameters are fitted at once
+            Aeff = np.array([model.Aeff for model in models], dtype=float)
+            spline = NonlinearityFromEffectiveArea._fit(
+                [model.neff for model in models], Aeff, first.lambdas)
+            gamma, scale = NonlinearityFromEffectiveArea._batch(
+                spline, V, first.w0, first.n2, first.neff_max,
+                first.lambdas, Aeff)
+            return gamma, scale[0]
+
+        gamma, scale = zip(*(model.gamma(V) for model in models))
+        return np.array(gamma), scale[0]
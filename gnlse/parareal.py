@@ -0,0 +1,252 @@
+"""Parallel-in-distance propagation with the parareal algorithm.
+
+The fiber is divided into spans propagated concurrently. A cheap coarse
+propagator, the fourth-order Runge-Kutta method in the interaction picture
+[H07]_ with a few fixed steps per span, predicts the field at the start of
+every span serially. The accurate ``GNLSE`` propagator then integrates all
+spans in parallel from the predicted fields, and the predictions are
+corrected with the difference of the fine and coarse propagators,
+
+.. math::
+
+   U_{k+1}^{j+1} = G(U_k^{j+1}) + F(U_k^j) - G(U_k^j),
+
+until the fields at the span boundaries stop changing. After iteration
+``j`` the first ``j`` spans are exact, so the iteration always terminates;
+the speed-up over a serial run is up to the number of spans divided by the
+number of iterations, with a free CPU for every span.
+
+The method pays off only if the fine propagation of the whole fiber is much
+more expensive than a serial coarse sweep over all spans, e.g. for tight
+tolerances of the integrator with ``tolerance`` looser than them, and if
+the fields evolve smoothly enough for the coarse propagator to converge in
+a few iterations. Strongly nonlinear propagation, such as soliton fission
+or supercontinuum generation, needs about as many iterations as spans and
+is then slower than a serial run.
+
+"""
+
+import concurrent.futures
+import copy
+import os
+
+import numpy as np
+
+from gnlse.gnlse import GNLSE, Solution
+
+
+def _propagate_span(setup):
+    """Fine propagation of a span in a worker process."""
+    solution = GNLSE(setup).run()
+    return solution.At, solution.AW, solution.stats
+
+
+class PararealGNLSE(object):
+    """
+    Models propagation of an optical pulse in a fiber with spans of the
+    fiber integrated in parallel.
+
+    Attributes
+    ----------
+    spans : int
+        Number of spans propagated in parallel.
+    coarse_steps : int
+        Number of steps of the coarse propagator per span.
+    tolerance : float
+        Largest relative change of the fields at span boundaries between
+        iterations at convergence.
+    max_iterations : int
+        Maximum number of iterations.
+    """
+
+    def __init__(self, setup, spans=None, coarse_steps=8, tolerance=None,
+                 max_iterations=None):
+        """
+        Parameters
+        ----------
+        setup : GNLSESetup
+            Model inputs in the form of a ``GNLSESetup`` object.
+        spans : int, optional
+            Number of spans, the number of CPUs by default. Limited by the
+            number of intervals between saved slices.
+        coarse_steps : int, optional
+            Number of steps of the coarse propagator per span.
+        tolerance : float, optional
+            Convergence tolerance, ``rtol`` of the setup by default.
+        max_iterations : int, optional
+            Maximum number of iterations, the number of spans by default,
+            after which the solution equals that of a serial run.
+        """
+
+        self.setup = setup
+        self.solver = GNLSE(setup)
+        if self.solver.dispersion_table is not None \
+                or self.solver.gamma_table is not None:
+            raise ValueError(
+                "longitudinally varying fibers are not supported")
+        if self.solver.moving_frame is not None:
+            raise ValueError("moving frames are not supported")
+        if setup.z_saves < 2:
+            raise ValueError("'z_saves' has to be at least 2")
+
+        if spans is None:
+            spans = os.cpu_count() or 1
+        self.spans = max(1, min(spans, setup.z_saves - 1))
+        self.coarse_steps = coarse_steps
+        self.tolerance = setup.rtol if tolerance is None else tolerance
+        self.max_iterations = self.spans if max_iterations is None \
+            else max_iterations
+
+        # Span boundaries at saved slices
+        self.boundaries = np.round(np.linspace(
+            0, setup.z_saves - 1, self.spans + 1)).astype(int)
+        self.Z = np.linspace(0, setup.fiber_length, setup.z_saves)
+
+    def _nonlinear(self, AW):
+        """Nonlinear operator in the frequency domain."""
+        solver = self.solver
+        dt = solver.t[1] - solver.t[0]
+        At = np.fft.fft(AW)
+        IT = np.abs(At)**2
+        if solver.RW is not None:
+            RS = dt * solver.fr * np.fft.fft(np.fft.ifft(IT) * solver.RW)
+            M = np.fft.ifft(At * ((1 - solver.fr) * IT + RS))
+        else:
+            M = np.fft.ifft(At * IT)
+        rv = 1j * solver.gamma * solver.W * M
+        if solver.frequency_absorption is not None:
+            rv -= solver.frequency_absorption * AW
+        if solver.time_absorption is not None:
+            rv -= np.fft.ifft(solver.time_absorption * At)
+        return rv
+
+    def coarse(self, A, length):
+        """
+        Coarse propagation of a field over a span.
+
+        Parameters
+        ----------
+        A : ndarray, (n,)
+            Field at the start of the span in the time domain.
+        length : float
+            Length of the span [m].
+
+        Returns
+        -------
+        ndarray, (n,)
+            Field at the end of the span in the time domain.
+        """
+        solver = self.solver
+        h = length / self.coarse_steps
+        half = np.exp(np.fft.fftshift(solver.D) * h / 2)
+        AW = np.fft.ifft(A) * solver.scale
+        for _ in range(self.coarse_steps):
+            AI = half * AW
+            k1 = half * self._nonlinear(AW)
+            k2 = self._nonlinear(AI + h / 2 * k1)
+            k3 = self._nonlinear(AI + h / 2 * k2)
+            k4 = self._nonlinear(half * (AI + h * k3))
+            AW = half * (AI + h / 6 * (k1 + 2 * k2 + 2 * k3)) + h / 6 * k4
+        A = np.fft.fft(AW / solver.scale)
+        if not np.all(np.isfinite(A)):
+            raise ValueError("coarse propagation diverged, increase "
+                             "'coarse_steps'")
+        return A
+
+    def _span_setup(self, k, A):
+        setup = copy.copy(self.setup)
+        start, stop = self.boundaries[k], self.boundaries[k + 1]
+        setup.fiber_length = self.Z[stop] - self.Z[start]
+        setup.z_saves = stop - start + 1
+        setup.pulse_model = A
+        setup.progress_bar = False
+        # Absorption rates of the boundaries are set by the whole fiber
+        for name in ('time_boundary', 'frequency_boundary'):
+            boundary = getattr(setup, name)
+            if boundary is not None:
+                boundary = copy.copy(boundary)
+                boundary.strength *= setup.fiber_length \
+                    / self.setup.fiber_length
+                setattr(setup, name, boundary)
+        return setup
+
+    def run(self, executor=None):
+        """
+        Solve one mode GNLSE equation described by the given
+        ``GNLSESetup`` object with spans integrated in parallel.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor, optional
+            Executor running the fine propagation of spans. A process pool
+            with one process per span is used by default.
+
+        Returns
+        -------
+        Solution
+            Simulation results in the form of a ``Solution`` object. Its
+            statistics include the number of iterations (``iterations``),
+            whether they converged (``converged``) and the relative change
+            of the fields at span boundaries in every iteration
+            (``residuals``).
+        """
+        own_executor = executor is None
+        if own_executor:
+            executor = concurrent.futures.ProcessPoolExecutor(self.spans)
+
+        lengths = np.diff(self.Z[self.boundaries])
+        # Initial prediction of the fields at the span boundaries
+        U = [self.solver.A]
+        for k in range(self.spans):
+            U.append(self.coarse(U[k], lengths[k]))
+        G = U[1:]
+
+        fine = [None] * self.spans
+        starts = [None] * self.spans
+        residuals = []
+        nfev = 0
+        converged = False
+        try:
+            for iteration in range(1, self.max_iterations + 1):
+                # Fine propagation of spans whose start field has changed
+                futures = {}
+                for k in range(self.spans):
+                    if starts[k] is None or \
+                            not np.array_equal(starts[k], U[k]):
+                        starts[k] = U[k]
+                        futures[k] = executor.submit(
+                            _propagate_span, self._span_setup(k, U[k]))
+                for k, future in futures.items():
+                    fine[k] = future.result()
+                    nfev += fine[k][2]['nfev']
+
+                # Serial correction
+                U_new = [U[0]]
+                G_new = []
+                for k in range(self.spans):
+                    G_new.append(self.coarse(U_new[k], lengths[k]))
+                    U_new.append(G_new[k] + fine[k][0][-1] - G[k])
+
+                residual = max(
+                    np.linalg.norm(U_new[k] - U[k])
+                    / max(np.linalg.norm(U_new[k]), np.finfo(float).tiny)
+                    for k in range(1, self.spans + 1))
+                residuals.append(float(residual))
+                U, G = U_new, G_new
+                if residual <= self.tolerance:
+                    converged = True
+                    break
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        # Slices of the last fine propagation, without the repeated
+        # boundaries of consecutive spans
+        At = np.concatenate([fine[0][0][:1]]
+                            + [fine[k][0][1:] for k in range(self.spans)])
+        AW = np.concatenate([fine[0][1][:1]]
+                            + [fine[k][1][1:] for k in range(self.spans)])
+        stats = {'nfev': nfev, 'iterations': iteration,
+                 'converged': converged, 'residuals': residuals}
+        return Solution(self.solver.t, self.solver.Omega, self.solver.w_0,
+                        self.Z, At, AW, stats=stats)
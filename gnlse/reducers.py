@@ -0,0 +1,92 @@
+"""Reductions of saved slices to low-dimensional traces along the fiber.
+
+Reducers passed to ``GNLSE.run`` are evaluated on every saved slice and
+their results are stored in ``Solution.traces``, optionally without the
+fields themselves. A reducer is any callable
+
+.. code-block:: python
+
+    reducer(t, W, At, AW)
+
+of the delays ``t`` of the slice [ps], including the offset of a moving
+frame, the absolute angular frequency grid ``W`` [rad/ps] and the slice in
+the time (``At``) and frequency (``AW``) domains, returning a number or an
+array of a fixed shape.
+
+Example
+-------
+::
+
+    solution = solver.run(fields=False, reducers={
+        'peak_power': gnlse.reducers.peak_power,
+        'bandwidth': gnlse.reducers.SpectralBandwidth(-20)})
+
+"""
+
+import numpy as np
+
+from gnlse.common import c
+
+
+def peak_power(t, W, At, AW):
+    """Peak power of a slice [W]."""
+    return np.max(np.abs(At)**2)
+
+
+def energy(t, W, At, AW):
+    """Energy of a slice [pJ]."""
+    return np.sum(np.abs(At)**2) * (t[1] - t[0])
+
+
+def centroid_delay(t, W, At, AW):
+    """Delay of the energy centroid of a slice [ps]."""
+    IT = np.abs(At)**2
+    return np.sum(t * IT) / np.sum(IT)
+
+
+def rms_duration(t, W, At, AW):
+    """Root-mean-square duration of a slice [ps]."""
+    IT = np.abs(At)**2
+    mean = np.sum(t * IT) / np.sum(IT)
+    return np.sqrt(np.sum((t - mean)**2 * IT) / np.sum(IT))
+
+
+class SpectralBandwidth(object):
+    """Width of the spectrum of a slice [THz] between its outermost
+    frequencies at which the spectral intensity exceeds a level relative
+    to its maximum.
+
+    Attributes
+    ----------
+    level : float
+        Level relative to the maximum [dB].
+    """
+
+    def __init__(self, level=-20):
+        self.level = level
+
+    def __call__(self, t, W, At, AW):
+        IW = np.abs(AW)**2
+        above = np.flatnonzero(IW >= np.max(IW) * 10**(self.level / 10))
+        return (W[above[-1]] - W[above[0]]) / 2 / np.pi
+
+
+class BandEnergy(object):
+    """Energy of a slice in a band of wavelengths [pJ].
+
+    Attributes
+    ----------
+    wavelength_range : list, (2, )
+        Range of wavelengths [nm].
+    """
+
+    def __init__(self, wavelength_range):
+        self.wavelength_range = wavelength_range
+
+    def __call__(self, t, W, At, AW):
+        WL = 2 * np.pi * c / W
+        band = np.logical_and(WL >= self.wavelength_range[0],
+                              WL <= self.wavelength_range[1])
+        # Parseval's theorem for the scaling of AW in GNLSE.run
+        df = (W[1] - W[0]) / 2 / np.pi
+        return np.sum(np.abs(AW[band])**2) * df
@@ -0,0 +1,279 @@
+"""Detection and tracking of temporal peaks, e.g. ejected solitons.
+
+Peaks of the temporal intensity are found in all saved slices at once: a
+sample is a peak if it is the largest within ``window`` around it and
+exceeds ``threshold`` of the peak power of its slice. Peaks below a minimum
+peak power or duration, such as interference fringes of dispersive waves,
+can be dropped. For every peak, its
+full width at half maximum and the central frequency of the spectrum of
+the field in a Hann window around it are computed in the same vectorized
+pass. Slices are read in chunks, so that solutions stored in files
+(``gnlse.LazySolution``) are processed without loading them completely.
+
+Peaks in consecutive slices are then linked into trajectories by the
+nearest delay.
+
+Example
+-------
+::
+
+    with gnlse.LazySolution('result.h5') as solution:
+        trajectories = gnlse.track_solitons(solution, threshold=0.1)
+    plt.plot(trajectories.delay.T, trajectories.Z)
+
+"""
+
+import numpy as np
+import scipy.ndimage
+
+
+class Peaks(object):
+    """
+    Peaks of the temporal intensity of all slices of a solution.
+
+    Attributes
+    ----------
+    Z : ndarray, (m,)
+        Points at which intermediate steps were saved.
+    index : ndarray, (k,)
+        Index of the slice of every peak.
+    delay : ndarray, (k,)
+        Delay of every peak [ps].
+    power : ndarray, (k,)
+        Peak power [W].
+    duration : ndarray, (k,)
+        Full width at half maximum [ps], ``nan`` if the peak does not fall
+        to half maximum within the window.
+    frequency : ndarray, (k,)
+        Central frequency relative to the central frequency of the
+        simulation [THz].
+    """
+
+    def __init__(self, Z, index, delay, power, duration, frequency):
+        self.Z = Z
+        self.index = index
+        self.delay = delay
+        self.power = power
+        self.duration = duration
+        self.frequency = frequency
+
+    def __len__(self):
+        return len(self.index)
+
+
+class Trajectories(object):
+    """
+    Trajectories of peaks along the fiber. Rows are trajectories and
+    columns slices; entries of slices without the peak are ``nan``.
+
+    Attributes
+    ----------
+    Z : ndarray, (m,)
+        Points at which intermediate steps were saved.
+    delay : ndarray, (l, m)
+        Delay of the peak [ps].
+    power : ndarray, (l, m)
+        Peak power [W].
+    duration : ndarray, (l, m)
+        Full width at half maximum [ps].
+    frequency : ndarray, (l, m)
+        Central frequency relative to the central frequency of the
+        simulation [THz].
+    """
+
+    def __init__(self, Z, delay, power, duration, frequency):
+        self.Z = Z
+        self.delay = delay
+        self.power = power
+        self.duration = duration
+        self.frequency = frequency
+
+    def __len__(self):
+        return len(self.delay)
+
+
+def _half_width(P, center):
+    """Distance from the center of windows to the half maximum crossing
+    of their intensity on the right, in samples."""
+    half = P[:, center:center + 1] / 2
+    below = P[:, center:] < half
+    found = np.any(below, axis=1)
+    k = np.argmax(below, axis=1)
+    k = np.where(found, k, 1)
+    rows = np.arange(len(P))
+    # Linear interpolation between the last sample above and the first
+    # below half maximum
+    upper = P[rows, center + k - 1]
+    lower = P[rows, center + k]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        width = k - 1 + (upper - half[:, 0]) / (upper - lower)
+    return np.where(found, width, np.nan)
+
+
+def find_peaks(solution, threshold=0.1, window=1, min_power=0,
+               min_duration=0, chunk_size=64):
+    """
+    Finds peaks of the temporal intensity in all slices of a solution.
+
+    Parameters
+    ----------
+    solution : Solution
+        Model outputs in the form of a ``Solution`` or ``LazySolution``
+        object.
+    threshold : float, optional
+        Smallest peak power relative to the peak power of the slice.
+    window : float, optional
+        Width of the neighbourhood in which a peak is the largest sample,
+        and of the window of its duration and spectrum [ps].
+    min_power : float, optional
+        Smallest peak power [W].
+    min_duration : float, optional
+        Smallest full width at half maximum [ps]. Peaks whose duration is
+        not found within the window are kept.
+    chunk_size : int, optional
+        Number of slices processed, and read from a file, at once.
+
+    Returns
+    -------
+    Peaks
+        Found peaks, ordered by slice and delay.
+    """
+
+    t = np.asarray(solution.t)
+    Z = np.asarray(solution.Z)
+    offset = getattr(solution, 'offset', None)
+    n = len(t)
+    dt = t[1] - t[0]
+    half = max(1, int(round(window / dt / 2)))
+    width = 2 * half + 1
+    # Hann window and frequency grid of the windowed spectrum
+    hann = np.hanning(width + 2)[1:-1]
+    f = np.fft.fftfreq(width, dt)
+    shifts = np.arange(-half, half + 1)
+
+    results = []
+    for start in range(0, len(Z), chunk_size):
+        At = np.asarray(solution.At[start:start + chunk_size])
+        IT = np.abs(At)**2
+        local_max = scipy.ndimage.maximum_filter1d(
+            IT, width, axis=1, mode='wrap')
+        level = np.maximum(threshold * np.max(IT, axis=1, keepdims=True),
+                           min_power)
+        peak = (IT == local_max) & (IT >= level) & (IT > 0)
+        rows, columns = np.nonzero(peak)
+
+        # Windows of the periodic field around every peak
+        samples = (columns[:, np.newaxis] + shifts) % n
+        A = At[rows[:, np.newaxis], samples]
+        P = np.abs(A)**2
+
+        duration = (_half_width(P, half)
+                    + _half_width(P[:, ::-1], half)) * dt
+        S = np.abs(np.fft.ifft(A * hann, axis=1))**2
+        frequency = np.sum(f * S, axis=1) / np.sum(S, axis=1)
+
+        index = rows + start
+        delay = t[columns]
+        if offset is not None:
+            delay = delay + np.asarray(offset)[index]
+        keep = ~(duration < min_duration)
+        results.append((index[keep], delay[keep], P[keep, half],
+                        duration[keep], frequency[keep]))
+
+    return Peaks(Z, *(np.concatenate(values) for values in zip(*results)))
+
+
+def track_peaks(peaks, max_shift=0.1):
+    """
+    Links peaks in consecutive slices into trajectories. Pairs of peaks
+    with the smallest difference of delays are linked first.
+
+    Parameters
+    ----------
+    peaks : Peaks
+        Peaks found by ``find_peaks``.
+    max_shift : float, optional
+        Largest change of delay of a peak between consecutive slices [ps].
+
+    Returns
+    -------
+    Trajectories
+        Trajectories of peaks, ordered by their first slice and delay.
+    """
+
+    m = len(peaks.Z)
+    bounds = np.searchsorted(peaks.index, np.arange(m + 1))
+    label = np.empty(len(peaks), dtype=int)
+    count = 0
+    previous = np.arange(0)
+    for j in range(m):
+        current = np.arange(bounds[j], bounds[j + 1])
+        distance = np.abs(peaks.delay[current][:, np.newaxis]
+                          - peaks.delay[previous][np.newaxis, :])
+        new = np.ones(len(current), dtype=bool)
+        if distance.size:
+            pairs = np.argwhere(distance <= max_shift)
+            pairs = pairs[np.argsort(distance[pairs[:, 0], pairs[:, 1]],
+                                     kind='stable')]
+            taken = np.zeros(len(previous), dtype=bool)
+            for a, b in pairs:
+                if new[a] and not taken[b]:
+                    label[current[a]] = label[previous[b]]
+                    new[a] = False
+                    taken[b] = True
+        label[current[new]] = count + np.arange(np.count_nonzero(new))
+        count += np.count_nonzero(new)
+        previous = current
+
+    arrays = []
+    for values in (peaks.delay, peaks.power, peaks.duration,
+                   peaks.frequency):
+        array = np.full((count, m), np.nan)
+        array[label, peaks.index] = values
+        arrays.append(array)
+    return Trajectories(peaks.Z, *arrays)
+
+
+def track_solitons(solution, threshold=0.1, window=1, max_shift=0.1,
+                   min_power=0, min_duration=0, min_length=1, chunk_size=64):
+    """
+    Finds peaks of the temporal intensity in all slices of a solution and
+    links them into trajectories.
+
+    Parameters
+    ----------
+    solution : Solution
+        Model outputs in the form of a ``Solution`` or ``LazySolution``
+        object.
+    threshold : float, optional
+        Smallest peak power relative to the peak power of the slice.
+    window : float, optional
+        Width of the neighbourhood in which a peak is the largest sample,
+        and of the window of its duration and spectrum [ps].
+    max_shift : float, optional
+        Largest change of delay of a peak between consecutive slices [ps].
+    min_power : float, optional
+        Smallest peak power [W].
+    min_duration : float, optional
+        Smallest full width at half maximum [ps].
+    min_length : int, optional
+        Smallest number of slices of a returned trajectory.
+    chunk_size : int, optional
+        Number of slices processed, and read from a file, at once.
+
+    Returns
+    -------
+    Trajectories
+        Trajectories of peaks, ordered by their first slice and delay.
+    """
+
+    peaks = find_peaks(solution, threshold=threshold, window=window,
+                       min_power=min_power, min_duration=min_duration,
+                       chunk_size=chunk_size)
+    trajectories = track_peaks(peaks, max_shift=max_shift)
+    keep = np.count_nonzero(~np.isnan(trajectories.delay),
+                            axis=1) >= min_length
+    return Trajectories(trajectories.Z, trajectories.delay[keep],
+                        trajectories.power[keep],
+                        trajectories.duration[keep],
+                        trajectories.frequency[keep])
@@ -0,0 +1,276 @@
+"""Parallel parameter sweeps with results in shared memory.
+
+Solutions of a sweep run in a process pool are not sent back to the parent
+process. Every job writes its slices directly into its own slot of a
+``SweepStore``, a block of shared memory or a memory-mapped file, using the
+output arrays accepted by ``GNLSE.run``. Only the statistics of the solver
+are returned, and the parent reads the fields in place, without copying or
+serialization.
+
+Sweeps over the input pulse of a single fiber can instead run in a thread
+pool with ``run_threaded``, where all threads share the operators of one
+``GNLSE`` object. The FFTs and most array operations release the GIL.
+
+Example
+-------
+::
+
+    with gnlse.SweepStore(len(setups), 200, 2**13) as store:
+        solutions = gnlse.run_sweep(setups, store)
+        ...
+
+    solver = gnlse.GNLSE(setup)
+    solutions = gnlse.run_threaded(solver, pulses, max_workers=8)
+
+"""
+
+import concurrent.futures
+import inspect
+import os
+import weakref
+
+import numpy as np
+
+from gnlse.gnlse import GNLSE, Solution
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+
+def _attach(name):
+    """Attaches to an existing block of shared memory."""
+    if 'track' in inspect.signature(shared_memory.SharedMemory).parameters:
+        # The block is owned and released by the creating process
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class SweepStore(object):
+    """
+    Shared output arrays of the jobs of a sweep, one slot per job.
+
+    The store is passed to worker processes by the name of its shared
+    memory block or the path of its file, never by its contents. Arrays
+    returned by the store, including the fields of solutions returned by
+    ``run_sweep`` and ``run_threaded``, are views of the shared buffer.
+    They stay valid after the store is closed: the block is unmapped once
+    the last of them is gone.
+
+    Attributes
+    ----------
+    jobs : int
+        Number of slots.
+    z_saves : int
+        Number of saved slices of every job.
+    resolution : int
+        Number of points of the grids of every job.
+    path : str
+        Path of the memory-mapped file, or None for shared memory.
+    At : ndarray, (jobs, z_saves, resolution)
+        Intermediate steps of all jobs in the time domain.
+    AW : ndarray, (jobs, z_saves, resolution)
+        Intermediate steps of all jobs in the frequency domain.
+    """
+
+    def __init__(self, jobs, z_saves, resolution, path=None):
+        """
+        Parameters
+        ----------
+        jobs : int
+            Number of slots.
+        z_saves : int
+            Number of saved slices of every job.
+        resolution : int
+            Number of points of the grids of every job.
+        path : str, optional
+            Path of a file mapped into memory instead of shared memory,
+            e.g. for sweeps larger than the memory. The file is kept when
+            the store is closed.
+        """
+
+        self.jobs = jobs
+        self.z_saves = z_saves
+        self.resolution = resolution
+        self.path = path
+        self._owner = True
+        self._create()
+
+    @property
+    def shape(self):
+        return (2, self.jobs, self.z_saves, self.resolution)
+
+    def _create(self):
+        if self.path is not None:
+            self._shm = None
+            self._buffer = np.lib.format.open_memmap(
+                self.path, mode='w+', dtype=complex, shape=self.shape)
+        else:
+            if shared_memory is None:
+                raise ImportError("shared memory requires Python 3.8 or "
+                                  "later, give 'path' of a file instead")
+            size = int(np.prod(self.shape)) * np.dtype(complex).itemsize
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._map()
+
+    def _open(self, name):
+        if self.path is not None:
+            self._shm = None
+            self._buffer = np.load(self.path, mmap_mode='r+')
+        else:
+            self._shm = _attach(name)
+            self._map()
+
+    def _map(self):
+        self._buffer = np.ndarray(self.shape, dtype=complex,
+                                  buffer=self._shm.buf)
+        # Views of the buffer do not pin the block, which is unmapped only
+        # when the buffer and all its views are gone
+        weakref.finalize(self._buffer, self._shm.close)
+
+    def __getstate__(self):
+        state = {key: value for key, value in self.__dict__.items()
+                 if key not in ('_shm', '_buffer')}
+        state['_owner'] = False
+        state['name'] = None if self._shm is None else self._shm.name
+        return state
+
+    def __setstate__(self, state):
+        name = state.pop('name')
+        self.__dict__.update(state)
+        self._open(name)
+
+    @property
+    def At(self):
+        return self._buffer[0]
+
+    @property
+    def AW(self):
+        return self._buffer[1]
+
+    def close(self):
+        """
+        Releases the store. The shared memory block is removed once it is
+        closed in the process which created it, but stays mapped while
+        views of it, e.g. fields of solutions, are alive.
+        """
+        if self._buffer is None:
+            return
+        if isinstance(self._buffer, np.memmap):
+            self._buffer.flush()
+        self._buffer = None
+        if self._shm is not None:
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _run_job(store, index, setup):
+    """Runs a job writing its slices into the store."""
+    solver = GNLSE(setup)
+    solution = solver.run(At=store.At[index], AW=store.AW[index])
+    # Only the grids and statistics are sent back
+    return (solution.t, solution.W, solution.w_0, solution.Z,
+            solution.stats, solution.offset)
+
+
+def run_sweep(setups, store, executor=None):
+    """
+    Solves the GNLSE for many setups concurrently, with results written
+    into a shared store.
+
+    Parameters
+    ----------
+    setups : list of GNLSESetup
+        Model inputs with equal ``z_saves`` and ``resolution``, matching
+        those of the store.
+    store : SweepStore
+        Store with at least as many slots as setups.
+    executor : concurrent.futures.Executor, optional
+        Executor running the jobs. A process pool with one process per CPU
+        is used by default.
+
+    Returns
+    -------
+    list of Solution
+        Simulation results, in the order of setups, whose fields are views
+        of the store and stay valid after it is closed.
+    """
+
+    if len(setups) > store.jobs:
+        raise ValueError("store has %d slots for %d setups"
+                         % (store.jobs, len(setups)))
+    for setup in setups:
+        if setup.z_saves != store.z_saves \
+                or setup.resolution != store.resolution:
+            raise ValueError("'z_saves' and 'resolution' of setups have to "
+                             "match the store")
+
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            min(len(setups), os.cpu_count() or 1))
+    try:
+        futures = [executor.submit(_run_job, store, index, setup)
+                   for index, setup in enumerate(setups)]
+        results = [future.result() for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    solutions = []
+    for index, (t, W, w_0, Z, stats, offset) in enumerate(results):
+        # Failed integrations fill only a part of their slots
+        At = store.At[index, :len(Z)]
+        AW = store.AW[index, :len(Z)]
+        solutions.append(Solution(t, W, w_0, Z, At, AW, stats=stats,
+                                  offset=offset))
+    return solutions
+
+
+def run_threaded(solver, pulses, max_workers=None, store=None, **kwargs):
+    """
+    Propagates many input pulses through one fiber in a thread pool.
+
+    All threads share the operators of ``solver``, which are not copied,
+    while every thread has its own FFT buffers and plans.
+
+    Parameters
+    ----------
+    solver : GNLSE
+        Solver of the fiber.
+    pulses : list of Envelope or ndarray
+        Input pulses: envelope models or fields on the time grid.
+    max_workers : int, optional
+        Number of threads, the number of CPUs by default.
+    store : SweepStore, optional
+        Store with at least as many slots as pulses, into which the slices
+        are written. New arrays are allocated for every pulse by default.
+    **kwargs
+        Options of ``GNLSE.propagate``.
+
+    Returns
+    -------
+    list of Solution
+        Simulation results, in the order of pulses.
+    """
+
+    if store is not None and len(pulses) > store.jobs:
+        raise ValueError("store has %d slots for %d pulses"
+                         % (store.jobs, len(pulses)))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        futures = []
+        for index, pulse in enumerate(pulses):
+            if store is not None:
+                kwargs.update(At=store.At[index], AW=store.AW[index])
+            futures.append(executor.submit(solver.propagate, pulse,
+                                           **kwargs))
+        return [future.result() for future in futures]
@@ -10,6 +10,17 @@ from scipy.interpolate import interp2d
 from gnlse.common import c
 
 
+def _delays(solution):
+    """
+    Delay and distance grids of all slices, following a moving frame with
+    the offsets of the windows recorded in ``solution.offset``.
+    """
+    if solution.offset is None:
+        return solution.t, solution.Z
+    T = solution.t[np.newaxis, :] + np.reshape(solution.offset, (-1, 1))
+    return T, np.broadcast_to(np.reshape(solution.Z, (-1, 1)), T.shape)
+
+
 def plot_frequency_vs_distance_logarithmic(solver, ax=None, norm=None,
                                            frequency_range=None, cmap="magma"):
     """Plotting results in logarithmic scale in frequency domain.
@@ -483,8 +494,9 @@ def plot_delay_vs_distance_logarithmic(solver, time_range=None, ax=None,
     if ax is None:
         ax = plt.gca()
 
+    T, Z = _delays(solver)
     if time_range is None:
-        time_range = [np.min(solver.t), np.max(solver.t)]
+        time_range = [np.min(T), np.max(T)]
 
     if norm is None:
         norm = np.max(np.abs(solver.At)**2)
@@ -492,8 +504,7 @@ def plot_delay_vs_distance_logarithmic(solver, time_range=None, ax=None,
     lIT = 10 * np.log10(np.abs(solver.At)**2 / norm,
                         where=(np.abs(solver.At)**2 > 0))
 
-    ax.pcolormesh(solver.t, solver.Z, lIT, shading="auto", vmin=-40,
-                  cmap=cmap)
+    ax.pcolormesh(T, Z, lIT, shading="auto", vmin=-40, cmap=cmap)
     ax.set_xlim(time_range)
     ax.set_xlabel("Delay [ps]")
     ax.set_ylabel("Distance [m]")
@@ -524,16 +535,16 @@ def plot_delay_vs_distance(solver, time_range=None, ax=None, norm=None,
     if ax is None:
         ax = plt.gca()
 
+    T, Z = _delays(solver)
     if time_range is None:
-        time_range = [np.min(solver.t), np.max(solver.t)]
+        time_range = [np.min(T), np.max(T)]
 
     if norm is None:
         norm = np.max(np.abs(solver.At)**2)
 
     lIT = np.abs(solver.At)**2 / norm
 
-    ax.pcolormesh(solver.t, solver.Z, lIT, shading="auto", vmin=0,
-                  cmap=cmap)
+    ax.pcolormesh(T, Z, lIT, shading="auto", vmin=0, cmap=cmap)
     ax.set_xlim(time_range)
     ax.set_xlabel("Delay [ps]")
     ax.set_ylabel("Distance [m]")
@@ -28,4 +28,13 @@ setup(
     ],
     python_requires='>=3.7',
     install_requires=reqs,
+    extras_require={
+        'jax': ['jax'],
+        'zarr': ['zarr'],
+        'yaml': ['pyyaml'],
+        'toml': ['tomli; python_version < "3.11"'],
+    },
+    entry_points={
+        'console_scripts': ['gnlse = gnlse.cli:main'],
+    },
 )